@@ -0,0 +1,193 @@
+import asyncio
+import contextvars
+import functools
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers import asgi
+from django.db import close_old_connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Chunks a streamed body may run ahead of the client.
+STREAM_BUFFER_CHUNKS = 4
+# How often a producer blocked on a slow client checks for a disconnect.
+STREAM_PUT_TIMEOUT = 1
+
+executor = None
+
+
+class PoolStream:
+    """Body of a streaming response produced by the pool thread.
+
+    The thread that ran the view keeps iterating the content, so lazy
+    queries (the shopping list export) run on its connection, outside
+    the event loop. Chunks go through a bounded queue: iterating it from
+    async code awaits each chunk; plain iteration blocks the caller, for
+    handlers that only know synchronous bodies.
+    """
+
+    def __init__(self, content):
+        self.content = content
+        self.chunks = queue.Queue(STREAM_BUFFER_CHUNKS)
+        self.closed = threading.Event()
+
+    def produce(self):
+        try:
+            for chunk in self.content:
+                if not self.put((chunk, None)):
+                    return
+        except Exception as error:
+            self.put((None, error))
+        else:
+            self.put((None, None))
+
+    def put(self, item):
+        while not self.closed.is_set():
+            try:
+                self.chunks.put(item, timeout=STREAM_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def unpack(self, item):
+        chunk, error = item
+        if error is not None:
+            raise error
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.unpack(self.chunks.get())
+            if chunk is None:
+                return
+            yield chunk
+
+    async def __aiter__(self):
+        get = sync_to_async(self.chunks.get, thread_sensitive=False)
+        while True:
+            chunk = self.unpack(await get())
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self):
+        # The body was sent or the client is gone: stop the producer and
+        # wake a reader still waiting for a chunk.
+        self.closed.set()
+        try:
+            self.chunks.put_nowait((None, None))
+        except queue.Full:
+            pass
+
+
+def discard_response(responded):
+    # The request was cancelled while its view ran.
+    if not responded.cancelled() and responded.exception() is None:
+        stream = getattr(responded.result(), 'pool_stream', None)
+        if stream is not None:
+            stream.close()
+
+
+def run_view(view, request, args, kwargs, responded):
+    """Run the view in a pool thread, then produce its streamed body.
+
+    responded gets the rendered response right away, so the headers go
+    out while this thread is still producing a streaming body.
+    """
+    if not responded.set_running_or_notify_cancel():
+        return
+    # Pool threads keep their own database connections; this is what the
+    # request_started and request_finished handlers do for the thread
+    # Django runs sync views in.
+    close_old_connections()
+    try:
+        try:
+            response = view(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response = response.render()
+        except Exception as error:
+            responded.set_exception(error)
+            return
+        if not response.streaming:
+            responded.set_result(response)
+            return
+        stream = PoolStream(response.streaming_content)
+        response.streaming_content = stream
+        response.pool_stream = stream
+        responded.set_result(response)
+        stream.produce()
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Serve GET, HEAD and OPTIONS of a sync view from a thread pool.
+
+    Django 3.2 has no async ORM, and under ASGI it runs every sync view
+    on one shared thread, so a worker waits on the database for one
+    request at a time. Safe requests of the wrapped view run, rendering
+    and streamed content included, in a pool of ASYNC_READ_THREADS
+    threads while the event loop keeps accepting connections; writes
+    still take the shared thread, as they would without the wrapper.
+    A streamed body holds its pool thread until it is sent.
+    """
+    shared_thread_view = sync_to_async(view, thread_sensitive=True)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        global executor
+        if request.method not in SAFE_METHODS:
+            return await shared_thread_view(request, *args, **kwargs)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_READ_THREADS,
+                thread_name_prefix='api-reads'
+            )
+        responded = Future()
+        executor.submit(
+            contextvars.copy_context().run,
+            run_view, view, request, args, kwargs, responded
+        )
+        try:
+            return await asyncio.wrap_future(responded)
+        except asyncio.CancelledError:
+            responded.add_done_callback(discard_response)
+            raise
+
+    return wrapper
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """Django's ASGI handler, awaiting the chunks of pool streams.
+
+    Django 3.2 iterates streamed bodies synchronously in the event loop,
+    which would block it while the pool thread runs the queries.
+    """
+
+    async def send_response(self, response, send):
+        stream = getattr(response, 'pool_stream', None)
+        if stream is None:
+            return await super().send_response(response, send)
+        # super() sends the headers, finds an empty body and closes it;
+        # the chunks go out just before that closing message.
+        response.streaming_content = ()
+
+        async def send_stream(message):
+            if message == {'type': 'http.response.body'}:
+                async for part in stream:
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send({
+                            'type': 'http.response.body',
+                            'body': chunk,
+                            'more_body': True,
+                        })
+            await send(message)
+
+        try:
+            await super().send_response(response, send_stream)
+        finally:
+            stream.close()
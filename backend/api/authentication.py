@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .cache import get_version
+
+
+class TokenCache:
+    """Bounded LRU of token key -> (user, token) snapshots.
+
+    Entries live for TOKEN_CACHE_TTL seconds. Logout, password change,
+    profile edits and deactivation bump the shared Token version (see
+    signals), and every worker drops its whole cache when it sees a new
+    version, so a revoked token stops working on the next request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.version = None
+
+    def get(self, key):
+        """Return (version, (user, token) or None).
+
+        The version is read before the database, so store() discards
+        an entry if an invalidation happened in between.
+        """
+        version = get_version(Token)
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+                return version, None
+            entry = self.entries.get(key)
+            if entry is None:
+                return version, None
+            user, token, expires_at = entry
+            if time.monotonic() > expires_at:
+                del self.entries[key]
+                return version, None
+            self.entries.move_to_end(key)
+        return version, snapshot(user, token)
+
+    def store(self, version, key, user, token):
+        user, token = snapshot(user, token)
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries[key] = (
+                user, token, time.monotonic() + settings.TOKEN_CACHE_TTL
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def snapshot(user, token):
+    # Requests get their own copies, so nothing a view sets on
+    # request.user leaks into the cache or into another thread.
+    user = copy.copy(user)
+    token = copy.copy(token)
+    token.user = user
+    return user, token
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token/User query on cache hits.
+
+    Unknown and inactive tokens are not cached; they fail in the
+    database lookup every time, as before.
+    """
+
+    def authenticate_credentials(self, key):
+        version, cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.store(version, key, user, token)
+        return user, token
@@ -0,0 +1,96 @@
+import fcntl
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+VERSION_KEY = 'response-version:{model}'
+RESPONSE_KEY = 'response:{model}:{version}:{params}'
+LOCK_FILE = 'counters.lock'
+
+
+class LockingFileBasedCache(FileBasedCache):
+    """FileBasedCache whose incr() and add() are atomic.
+
+    The stock backend implements both as a read followed by a write, so
+    two workers bumping a version at once could both get N + 1, and the
+    recipe change log would lose one of the entries. Here they hold an
+    exclusive flock on a file in the cache directory, which every worker
+    on the host shares. Memcached and Redis are atomic on their own.
+    """
+
+    @contextmanager
+    def lock(self):
+        self._createdir()
+        with open(os.path.join(self._dir, LOCK_FILE), 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def incr(self, key, delta=1, version=None):
+        with self.lock():
+            return super().incr(key, delta, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.lock():
+            return super().add(key, value, timeout, version)
+
+    def _cull(self):
+        # Expired entries go first, so live counters and pins are only
+        # culled when the live entries alone exceed MAX_ENTRIES.
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        for name in filelist:
+            try:
+                with open(name, 'rb') as file:
+                    self._is_expired(file)
+            except FileNotFoundError:
+                pass
+        super()._cull()
+
+
+def version_key(model):
+    return VERSION_KEY.format(model=model._meta.label_lower)
+
+
+def get_version(model):
+    cache = caches['state']
+    key = version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted counter never goes back to
+        # a value that older cached responses were stored under.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(model):
+    cache = caches['state']
+    try:
+        return cache.incr(version_key(model))
+    except ValueError:
+        version = time.time_ns()
+        cache.set(version_key(model), version, timeout=None)
+        return version
+
+
+def response_key(model, params):
+    """Key of a cached response, given the request values the view reads.
+
+    Other query parameters do not change the response, so they must not
+    make a new entry either; the values are hashed to keep the key short.
+    """
+    return RESPONSE_KEY.format(
+        model=model._meta.label_lower,
+        version=get_version(model),
+        params=hashlib.md5(urlencode(params).encode()).hexdigest()
+    )
@@ -0,0 +1,74 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+PIN_KEY = 'primary-pin:{user_id}'
+# Authentication must see tokens created a moment ago on the primary.
+PRIMARY_MODELS = ('authtoken.token',)
+
+replica = ContextVar('replica', default=None)
+
+
+def pin_key(user):
+    return PIN_KEY.format(user_id=user.id)
+
+
+def pin_to_primary(user):
+    """Send the user's reads to the primary for REPLICA_PIN_SECONDS."""
+    if settings.DATABASE_REPLICAS and user.is_authenticated:
+        caches['state'].set(
+            pin_key(user), True, settings.REPLICA_PIN_SECONDS
+        )
+
+
+def use_replica(user):
+    """Route this context's reads to a replica.
+
+    One replica serves the whole request, so its reads see one snapshot.
+    Users that wrote recently stay on the primary and read their writes.
+    """
+    if not settings.DATABASE_REPLICAS or (
+            user.is_authenticated and caches['state'].get(pin_key(user))):
+        return
+    replica.set(random.choice(settings.DATABASE_REPLICAS))
+
+
+@contextmanager
+def primary():
+    """Read from the primary, e.g. to fill version-keyed caches.
+
+    A lagging replica would otherwise store stale data under a version
+    that has already been bumped for the new one.
+    """
+    token = replica.set(None)
+    try:
+        yield
+    finally:
+        replica.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads inside use_replica() to the chosen replica."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in PRIMARY_MODELS:
+            return None
+        return replica.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = ('default', *settings.DATABASE_REPLICAS)
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -1,13 +1,62 @@
 import base64
+import tempfile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
+from rest_framework.exceptions import ValidationError
 from rest_framework.serializers import ImageField
 
+INVALID_BASE64 = 'Некорректные данные изображения'
+IMAGE_TOO_LARGE = (
+    'Размер изображения не должен превышать {size}x{size} пикселей'
+)
+BASE64_CHUNK_SIZE = 64 * 1024
+BASE64_SEPARATOR = ';base64,'
+
+
+def decode_base64(data, start=0):
+    """Decode data[start:] in chunks into a spooled temporary file.
+
+    MIME base64 wraps lines, so whitespace is dropped from each chunk and
+    the characters after its last whole 4-character group are carried
+    over to the next one; the payload itself is never copied whole.
+    """
+    file = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    rest = ''
+    for position in range(start, len(data), BASE64_CHUNK_SIZE):
+        chunk = rest + ''.join(
+            data[position:position + BASE64_CHUNK_SIZE].split()
+        )
+        end = len(chunk) - len(chunk) % 4
+        file.write(base64.b64decode(chunk[:end], validate=True))
+        rest = chunk[end:]
+    # An incomplete last group fails here.
+    file.write(base64.b64decode(rest, validate=True))
+    file.seek(0)
+    return file
+
 
 class Base64ImageField(ImageField):
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-        return super().to_internal_value(data)
+            separator = data.find(BASE64_SEPARATOR)
+            if separator == -1:
+                raise ValidationError(INVALID_BASE64)
+            ext = data[:separator].split('/')[-1]
+            try:
+                data = File(
+                    decode_base64(data, separator + len(BASE64_SEPARATOR)),
+                    name='temp.' + ext
+                )
+            except ValueError:
+                # binascii.Error, or characters outside ASCII.
+                raise ValidationError(INVALID_BASE64)
+        image = super().to_internal_value(data)
+        # Pillow reads only the header here, pixels are not decoded yet.
+        if max(image.image.size) > settings.IMAGE_MAX_SIDE:
+            raise ValidationError(
+                IMAGE_TOO_LARGE.format(size=settings.IMAGE_MAX_SIDE)
+            )
+        return image
@@ -1,5 +1,6 @@
 from django_filters.rest_framework import filters, FilterSet
 from foodgram.models import Recipe, Tag
+from foodgram.search import search_recipes
 
 
 class RecipeFilter(FilterSet):
@@ -14,6 +15,9 @@ class RecipeFilter(FilterSet):
     is_favorited = filters.BooleanFilter(
         method='filter_is_favorited'
     )
+    search = filters.CharFilter(
+        method='filter_search'
+    )
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value:
@@ -25,6 +29,9 @@ class RecipeFilter(FilterSet):
             return queryset.filter(favorited__user=self.request.user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
     class Meta:
         model = Recipe
         fields = (
@@ -32,4 +39,5 @@ class RecipeFilter(FilterSet):
             'tags',
             'is_in_shopping_cart',
             'is_favorited',
+            'search',
         )
@@ -0,0 +1,91 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from foodgram.models import Ingredient
+from .cache import get_version
+from .db import primary
+
+
+class IngredientIndex:
+    """Sorted in-memory copy of the ingredient catalog for autocomplete.
+
+    Answers prefix matches with a binary search and appends substring
+    matches after them. Servers build it at startup (warm()); it is
+    rebuilt lazily after invalidation
+    (Ingredient save/delete signals), when another worker bumped the
+    shared ingredient version, or once it is older than
+    INGREDIENT_INDEX_TTL, which covers bulk writes that skip signals.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = self.entries = None
+        self.built_at = 0
+        self.version = None
+
+    def invalidate(self):
+        with self.lock:
+            self.keys = self.entries = None
+
+    def warm(self):
+        """Build the index in the background, so no request waits for it.
+
+        Requests that come in before it is built wait on the lock.
+        """
+        if not settings.INGREDIENT_INDEX_TTL:
+            return None
+        thread = threading.Thread(
+            target=self.warm_up, name='ingredient-index', daemon=True
+        )
+        thread.start()
+        return thread
+
+    def warm_up(self):
+        try:
+            self.load()
+        except DatabaseError:
+            # Not migrated yet; the first request builds it.
+            pass
+        finally:
+            connections.close_all()
+
+    def load(self):
+        version = get_version(Ingredient)
+        with self.lock, primary():
+            if (self.entries is None or self.version != version
+                    or time.monotonic() - self.built_at
+                    > settings.INGREDIENT_INDEX_TTL):
+                rows = sorted(
+                    (name.casefold(), id, name, measurement_unit)
+                    for id, name, measurement_unit
+                    in Ingredient.objects.values_list(
+                        'id', 'name', 'measurement_unit'
+                    ).iterator()
+                )
+                self.keys = [row[0] for row in rows]
+                self.entries = [
+                    {'id': id, 'name': name,
+                     'measurement_unit': measurement_unit}
+                    for _, id, name, measurement_unit in rows
+                ]
+                self.built_at = time.monotonic()
+                self.version = version
+            return self.keys, self.entries
+
+    def search(self, query):
+        keys, entries = self.load()
+        query = query.casefold()
+        start = end = bisect_left(keys, query)
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        return entries[start:end] + [
+            entry for key, entry in zip(keys, entries)
+            if query in key and not key.startswith(query)
+        ]
+
+
+ingredient_index = IngredientIndex()
@@ -1,11 +1,246 @@
+import hashlib
+import re
+from collections import OrderedDict
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.functional import cached_property
+from django.utils.http import parse_etags
+from rest_framework.fields import (CharField, EmailField, FileField,
+                                   IntegerField, ReadOnlyField,
+                                   SerializerMethodField, SkipField,
+                                   SlugField)
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
 from foodgram.models import Follow
+from .cache import response_key
+from .db import pin_to_primary, primary, replica, use_replica
 
 
 class IsSubscriberMixin:
     def is_subscribed(self, subscribed_to):
+        if hasattr(subscribed_to, 'is_subscribed'):
+            return subscribed_to.is_subscribed
         if self.context['request'].user.is_authenticated:
             return Follow.objects.filter(
                 subscriber=self.context['request'].user,
                 subscribed_to=subscribed_to
             ).exists()
         return False
+
+
+# File names that storage.url() and build_absolute_uri() leave as is.
+PLAIN_FILE_NAME = re.compile(r'[\w-]+(/[\w-]+)*(\.\w+)*', re.ASCII)
+
+# Exact field classes whose to_representation is a plain conversion.
+CONVERTERS = {
+    CharField: str,
+    EmailField: str,
+    SlugField: str,
+    IntegerField: int,
+    ReadOnlyField: None,
+}
+
+
+def identity(value):
+    return value
+
+
+def attribute_getter(field):
+    def get_attribute(instance):
+        attribute = field.get_attribute(instance)
+        if isinstance(attribute, PKOnlyObject) and attribute.pk is None:
+            return None
+        return attribute
+    return get_attribute
+
+
+def source_getter(field):
+    """attrgetter for the field's source, with DRF's lookup as fallback.
+
+    Missing attributes, None or missing related objects, mappings and
+    callables (which DRF calls) go through field.get_attribute, so
+    default, allow_null and SkipField behave exactly as in DRF.
+    """
+    get = attrgetter('.'.join(field.source_attrs))
+
+    def get_attribute(instance):
+        try:
+            attribute = get(instance)
+        except (AttributeError, ObjectDoesNotExist):
+            return field.get_attribute(instance)
+        if callable(attribute):
+            return field.get_attribute(instance)
+        return attribute
+    return get_attribute
+
+
+def media_urls(request):
+    """Return a function mapping a stored file name to its URL.
+
+    Gives what FileField.to_representation gives: absolute with a
+    request, relative without. Plain names skip the URL quoting and
+    joining, which is most of the cost of a recipe with image variants.
+    """
+    base_url = default_storage.url('')
+    prefix = request.build_absolute_uri(base_url) if request else base_url
+
+    def url(name):
+        if PLAIN_FILE_NAME.fullmatch(name):
+            return prefix + name
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+    return url
+
+
+def file_converter(field):
+    url = media_urls(field.context.get('request'))
+
+    def convert(value):
+        if not value:
+            return None
+        if value.storage is not default_storage:
+            return field.to_representation(value)
+        return url(value.name)
+    return convert
+
+
+def compile_field(field):
+    """Return (getter, converter) producing the field's representation.
+
+    Method fields call the bound method directly; plain model attributes
+    are read with source_getter and converted with str/int, files with
+    media_urls; anything else keeps DRF's own
+    get_attribute/to_representation.
+    """
+    if isinstance(field, SerializerMethodField):
+        return identity, getattr(field.parent, field.method_name)
+    if isinstance(field, FileField) and getattr(
+            field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return source_getter(field), file_converter(field)
+    if type(field) in CONVERTERS:
+        return (
+            identity if field.source == '*' else source_getter(field),
+            CONVERTERS[type(field)] or identity
+        )
+    return attribute_getter(field), field.to_representation
+
+
+class CompiledFieldsMixin:
+    """Serializer.to_representation with the per-field work done once.
+
+    DRF resolves every field's attribute and representation through its
+    generic machinery for every object; here getters and converters are
+    compiled on first use and reused for every object of the page, with
+    the same output.
+    """
+
+    @cached_property
+    def compiled_fields(self):
+        return [
+            (field.field_name, *compile_field(field))
+            for field in self._readable_fields
+        ]
+
+    def to_representation(self, instance):
+        representation = OrderedDict()
+        for name, get_attribute, convert in self.compiled_fields:
+            try:
+                attribute = get_attribute(instance)
+            except SkipField:
+                continue
+            representation[name] = (
+                None if attribute is None else convert(attribute)
+            )
+        return representation
+
+
+class VersionedCacheMixin:
+    """Serve rendered JSON from the cache until cache_model changes.
+
+    Responses are keyed by the URL kwargs and the cache_params query
+    parameters, the only input the cached views read.
+    """
+
+    cache_model = None
+    cache_params = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+        key = response_key(self.cache_model, [
+            *sorted(kwargs.items()),
+            *((name, request.query_params.get(name, ''))
+              for name in self.cache_params),
+        ])
+        cached = cache.get(key)
+        if cached is None:
+            with primary():
+                response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = renderer.render(
+                response.data,
+                request.accepted_media_type,
+                self.get_renderer_context()
+            )
+            cached = (f'"{hashlib.md5(content).hexdigest()}"', content)
+            cache.set(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+        etag, content = cached
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (
+                etag in parse_etags(if_none_match) or if_none_match == '*'):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=renderer.media_type)
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.RESPONSE_CACHE_MAX_AGE
+        )
+        return response
+
+
+class ReplicaReadsMixin:
+    """Read from a replica on safe requests, see api.db.
+
+    Successful writes pin the user to the primary, so their next reads
+    (recipe page, feed, shopping list) see what they just changed.
+    replica_reads = False only pins.
+    """
+
+    replica_reads = True
+
+    def dispatch(self, request, *args, **kwargs):
+        # Undoes use_replica() on every way out, including exceptions
+        # DRF does not handle and that skip finalize_response().
+        token = replica.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.replica_reads and request.method in SAFE_METHODS:
+            use_replica(request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
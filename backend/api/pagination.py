@@ -1,7 +1,119 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
 from django.conf import settings
-from rest_framework.pagination import PageNumberPagination
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_NOT_SUPPORTED = (
+    'Параметр cursor нельзя использовать с этой сортировкой, '
+    'например с поиском'
+)
+
+
+class CursorLimitPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    page_size = settings.PAGE_LIMIT_PAGINATION_PAGE_SIZE
+    ordering = ('-created_at', '-id')
 
 
 class PageLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = settings.PAGE_LIMIT_PAGINATION_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    cursor_pagination = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        ordering = tuple(getattr(
+            view, 'cursor_ordering', CursorLimitPagination.ordering
+        ))
+        if queryset.query.order_by and (
+                tuple(queryset.query.order_by) != ordering):
+            # E.g. search ranks by relevance, which the keyset on
+            # cursor_ordering would silently replace.
+            raise ValidationError({self.cursor_query_param: [
+                CURSOR_NOT_SUPPORTED
+            ]})
+        self.cursor_pagination = CursorLimitPagination()
+        self.cursor_pagination.ordering = ordering
+        return self.cursor_pagination.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RankedPagination(PageNumberPagination):
+    """Page numbers for ranked in-memory results, which have no column a
+    cursor could be keyed on."""
+    page_size_query_param = 'limit'
+    page_size = settings.PAGE_LIMIT_PAGINATION_PAGE_SIZE
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only pages over (created_at, id) keys.
+
+    The view fetches keys itself (one more than the page size) starting
+    after get_position(); the cursor is the last key of the page.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    page_size = settings.PAGE_LIMIT_PAGINATION_PAGE_SIZE
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_position(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, key = b64decode(
+                encoded.encode('ascii')
+            ).decode('ascii').split(' ')
+            position = parse_datetime(created_at), int(key)
+        except (TypeError, ValueError, UnicodeError):
+            position = (None, None)
+        if position[0] is None:
+            raise NotFound(CursorPagination.invalid_cursor_message)
+        return position
+
+    def paginate_keys(self, keys, request):
+        page_size = self.get_page_size(request)
+        self.next_link = None
+        if len(keys) > page_size:
+            keys = keys[:page_size]
+            created_at, key = keys[-1]
+            self.next_link = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param,
+                b64encode(
+                    f'{created_at.isoformat()} {key}'.encode('ascii')
+                ).decode('ascii')
+            )
+        return keys
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.next_link),
+            ('previous', None),
+            ('results', data),
+        ]))
@@ -0,0 +1,118 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+from foodgram.models import IngredientAmountForRecipe, Recipe
+from .cache import bump_version, get_version
+from .db import primary
+
+CHANGE_KEY = 'recipe-matcher:change:{version}'
+MAX_PENDING_CHANGES = 500
+
+
+def recipe_changed(recipe_id):
+    version = bump_version(Recipe)
+    caches['state'].set(
+        CHANGE_KEY.format(version=version), recipe_id,
+        timeout=settings.RECIPE_MATCHER_TTL
+    )
+
+
+class RecipeMatcher:
+    """Inverted index from ingredient id to the recipes that use it.
+
+    Postings are sorted int arrays, so scoring a set of ingredients is a
+    Counter over a few arrays instead of a join per request. Recipe
+    writes are published as a numbered change log in the cache
+    (recipe_changed), and every worker replays the recipes it missed.
+    The index is rebuilt from scratch when the log has gaps, when it is
+    too far behind, or once it is older than RECIPE_MATCHER_TTL, which
+    covers bulk writes that skip signals.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = self.recipes = None
+        self.built_at = 0
+        self.version = None
+
+    def rebuild(self, version):
+        postings = {}
+        recipes = {}
+        for recipe_id, ingredient_id in (
+            IngredientAmountForRecipe.objects.order_by(
+                'recipe_id'
+            ).values_list('recipe_id', 'ingredient_id').iterator()
+        ):
+            postings.setdefault(ingredient_id, array('q')).append(recipe_id)
+            recipes.setdefault(recipe_id, array('q')).append(ingredient_id)
+        self.postings = postings
+        self.recipes = recipes
+        self.built_at = time.monotonic()
+        self.version = version
+
+    def refresh(self, recipe_ids):
+        for recipe_id in recipe_ids:
+            for ingredient_id in self.recipes.pop(recipe_id, ()):
+                posting = self.postings[ingredient_id]
+                del posting[bisect_left(posting, recipe_id)]
+        for recipe_id, ingredient_id in (
+            IngredientAmountForRecipe.objects.filter(
+                recipe_id__in=recipe_ids
+            ).values_list('recipe_id', 'ingredient_id')
+        ):
+            insort(
+                self.postings.setdefault(ingredient_id, array('q')),
+                recipe_id
+            )
+            self.recipes.setdefault(
+                recipe_id, array('q')
+            ).append(ingredient_id)
+
+    def load(self):
+        version = get_version(Recipe)
+        with self.lock, primary():
+            if (self.postings is None
+                    or time.monotonic() - self.built_at
+                    > settings.RECIPE_MATCHER_TTL
+                    or not 0 <= version - self.version
+                    <= MAX_PENDING_CHANGES):
+                self.rebuild(version)
+            elif version != self.version:
+                changes = caches['state'].get_many([
+                    CHANGE_KEY.format(version=number)
+                    for number in range(self.version + 1, version + 1)
+                ])
+                if len(changes) < version - self.version:
+                    self.rebuild(version)
+                else:
+                    self.refresh(set(changes.values()))
+                    self.version = version
+            return self.postings, self.recipes
+
+    def match(self, ingredient_ids, max_missing=None):
+        """Return (recipe_id, missing_count) pairs, fewest missing first.
+
+        Recipes with the same number of missing ingredients are ordered
+        by descending id, i.e. newest first.
+        """
+        postings, recipes = self.load()
+        hits = Counter()
+        for ingredient_id in set(ingredient_ids):
+            hits.update(postings.get(ingredient_id, ()))
+        ranked = sorted(
+            (len(recipes[recipe_id]) - count, -recipe_id)
+            for recipe_id, count in hits.items()
+        )
+        return [
+            (-recipe_id, missing) for missing, recipe_id in ranked
+            if max_missing is None or missing <= max_missing
+        ]
+
+
+recipe_matcher = RecipeMatcher()
@@ -0,0 +1,48 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer rendered by orjson.
+
+    With DRF's default COMPACT_JSON, UNICODE_JSON and STRICT_JSON the
+    bytes are JSONRenderer's, except that floats in exponent notation
+    are written as 1e-7 rather than 1e-07 and NaN and infinities become
+    null instead of raising. Datetimes and everything orjson does not
+    know (Decimal, lazy strings, ...) go through DRF's own encoder.
+    Indented output (the browsable API, "; indent=4"), other settings
+    and values orjson cannot encode (integers over 64 bits) are left to
+    JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            self.ensure_ascii or not self.compact or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            content = orjson.dumps(
+                data,
+                default=encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        # Escaped by JSONRenderer too: valid JSON, but line breaks in
+        # JavaScript source.
+        return content.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
@@ -1,16 +1,20 @@
+from django.conf import settings
+from django.utils.functional import cached_property
 from djoser.serializers import UserSerializer
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import ReadOnlyField
-from rest_framework.serializers import (CharField, EmailField, IntegerField,
+from rest_framework.serializers import (IntegerField, ListField,
                                         ModelSerializer,
-                                        PrimaryKeyRelatedField,
+                                        PrimaryKeyRelatedField, Serializer,
                                         SerializerMethodField)
 
-from foodgram.models import (FavoriteRecipe, Follow, Ingredient,
+from foodgram.cart import refresh_recipe_carts
+from foodgram.images import discard_variants, schedule_image_variants
+from foodgram.models import (FavoriteRecipe, Ingredient,
                              IngredientAmountForRecipe, Recipe,
                              RecipeShoppingCart, Tag, User)
 from .fields import Base64ImageField
-from .mixins import IsSubscriberMixin
+from .mixins import CompiledFieldsMixin, IsSubscriberMixin, media_urls
 
 FIELD_INGREDIENTS_MUST_BE_SET = (
     'Поле "ingredients обязательно для обновления рецепта')
@@ -21,9 +25,13 @@ CANNOT_ADD_REPETITIVE_INGREDIENTS = (
     'Нельзя добавлять повторяющиеся ингредиенты'
 )
 CANNOT_ADD_REPETITIVE_TAGS = 'Нельзя добавлять повторяющиеся теги'
+DOES_NOT_EXIST = PrimaryKeyRelatedField.default_error_messages[
+    'does_not_exist'
+]
 
 
-class CustomUserSerializer(UserSerializer, IsSubscriberMixin):
+class CustomUserSerializer(CompiledFieldsMixin, UserSerializer,
+                           IsSubscriberMixin):
     is_subscribed = SerializerMethodField()
 
     class Meta:
@@ -41,7 +49,7 @@ class CustomUserSerializer(UserSerializer, IsSubscriberMixin):
         return self.is_subscribed(subscribed_to)
 
 
-class TagSerializer(ModelSerializer):
+class TagSerializer(CompiledFieldsMixin, ModelSerializer):
     class Meta:
         model = Tag
         fields = (
@@ -52,7 +60,7 @@ class TagSerializer(ModelSerializer):
         )
 
 
-class IngredientSerializer(ModelSerializer):
+class IngredientSerializer(CompiledFieldsMixin, ModelSerializer):
     class Meta:
         model = Ingredient
         fields = (
@@ -62,7 +70,7 @@ class IngredientSerializer(ModelSerializer):
         )
 
 
-class GETIngredientForRecipeSerializer(ModelSerializer):
+class GETIngredientForRecipeSerializer(CompiledFieldsMixin, ModelSerializer):
     id = ReadOnlyField(
         source='ingredient.id'
     )
@@ -84,9 +92,7 @@ class GETIngredientForRecipeSerializer(ModelSerializer):
 
 
 class IngredientForRecipeSerializer(ModelSerializer):
-    id = PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    id = IntegerField()
 
     class Meta:
         model = IngredientAmountForRecipe
@@ -96,7 +102,7 @@ class IngredientForRecipeSerializer(ModelSerializer):
         )
 
 
-class GETRecipeSerializer(ModelSerializer):
+class GETRecipeSerializer(CompiledFieldsMixin, ModelSerializer):
     tags = TagSerializer(
         many=True,
         read_only=True
@@ -110,6 +116,7 @@ class GETRecipeSerializer(ModelSerializer):
     )
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
+    image_variants = SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -122,11 +129,27 @@ class GETRecipeSerializer(ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         )
 
+    @cached_property
+    def media_url(self):
+        return media_urls(self.context.get('request'))
+
+    def get_image_variants(self, recipe):
+        return {
+            size: {
+                extension: self.media_url(name)
+                for extension, name in formats.items()
+            }
+            for size, formats in recipe.image_variants.items()
+        }
+
     def get_is_favorited(self, favorited_recipe):
+        if hasattr(favorited_recipe, 'is_favorited'):
+            return favorited_recipe.is_favorited
         if self.context['request'].user.is_authenticated:
             return FavoriteRecipe.objects.filter(
                 user=self.context['request'].user,
@@ -135,6 +158,8 @@ class GETRecipeSerializer(ModelSerializer):
         return False
 
     def get_is_in_shopping_cart(self, shopping_cart_object):
+        if hasattr(shopping_cart_object, 'is_in_shopping_cart'):
+            return shopping_cart_object.is_in_shopping_cart
         if self.context['request'].user.is_authenticated:
             return RecipeShoppingCart.objects.filter(
                 user=self.context['request'].user,
@@ -144,10 +169,7 @@ class GETRecipeSerializer(ModelSerializer):
 
 
 class RecipeSerializer(ModelSerializer):
-    tags = PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
-    )
+    tags = ListField(child=IntegerField())
     ingredients = IngredientForRecipeSerializer(
         many=True,
         source='recipe_amount'
@@ -170,18 +192,71 @@ class RecipeSerializer(ModelSerializer):
         IngredientAmountForRecipe.objects.bulk_create(
             IngredientAmountForRecipe(
                 recipe=recipe,
-                ingredient=ingredient['id'],
+                ingredient_id=ingredient['id'],
                 amount=ingredient['amount']
             )
             for ingredient in ingredients
         )
 
+    def update_ingredients(self, recipe, ingredients):
+        existing = {
+            amount.ingredient_id: amount
+            for amount in IngredientAmountForRecipe.objects.filter(
+                recipe=recipe
+            ).only('id', 'ingredient_id', 'amount')
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = [
+            amount.id for ingredient_id, amount in existing.items()
+            if ingredient_id not in amounts
+        ]
+        changed = []
+        for ingredient_id, value in amounts.items():
+            amount = existing.get(ingredient_id)
+            if amount is not None and amount.amount != value:
+                amount.amount = value
+                changed.append(amount)
+        if removed:
+            IngredientAmountForRecipe.objects.filter(id__in=removed).delete()
+        if changed:
+            IngredientAmountForRecipe.objects.bulk_update(changed, ['amount'])
+        self.create_ingredients(recipe, [
+            ingredient for ingredient in ingredients
+            if ingredient['id'] not in existing
+        ])
+        refresh_recipe_carts(recipe.id, (
+            (existing.keys() ^ amounts.keys())
+            | {amount.ingredient_id for amount in changed}
+        ))
+
+    def update_tags(self, recipe, tags):
+        # Like the ingredients: one read of the current ids, then writes
+        # only for the difference. tags.set() would read them twice when
+        # tags are added.
+        RecipeTag = Recipe.tags.through
+        existing = set(RecipeTag.objects.filter(
+            recipe=recipe
+        ).values_list('tag_id', flat=True))
+        tag_ids = set(tags)
+        if existing - tag_ids:
+            RecipeTag.objects.filter(
+                recipe=recipe, tag_id__in=existing - tag_ids
+            ).delete()
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag_id=tag_id)
+            for tag_id in tag_ids - existing
+        )
+
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('recipe_amount')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.create_ingredients(recipe, ingredients)
+        schedule_image_variants(recipe)
         return recipe
 
     def validate(self, recipe_data):
@@ -204,22 +279,39 @@ class RecipeSerializer(ModelSerializer):
             if tag_id in tags_id_list:
                 raise ValidationError(CANNOT_ADD_REPETITIVE_TAGS)
             tags_id_list.append(tag_id)
+        self.check_exist(Ingredient, ingredients_id_list)
+        self.check_exist(Tag, tags_id_list)
         return recipe_data
 
+    def check_exist(self, model, ids):
+        missing = set(ids) - set(
+            model.objects.filter(id__in=ids).values_list('id', flat=True)
+        )
+        if missing:
+            raise ValidationError(
+                DOES_NOT_EXIST.format(pk_value=min(missing))
+            )
+
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('recipe_amount')
-        IngredientAmountForRecipe.objects.filter(
-            recipe=instance,
-        ).delete()
-        self.create_ingredients(instance, ingredients)
-        instance.tags.set(tags)
-        return super().update(instance, validated_data)
+        self.update_ingredients(instance, ingredients)
+        self.update_tags(instance, tags)
+        if 'image' not in validated_data:
+            return super().update(instance, validated_data)
+        discard_variants(instance.image_variants)
+        instance.image_variants = {}
+        recipe = super().update(instance, validated_data)
+        schedule_image_variants(recipe)
+        return recipe
 
     def to_representation(self, instance):
+        request = self.context.get('request')
         return GETRecipeSerializer(
-            instance=instance,
-            context={'request': self.context.get('request')}
+            instance=Recipe.objects.for_detail(request.user).get(
+                pk=instance.pk
+            ),
+            context={'request': request}
         ).data
 
 
@@ -229,64 +321,80 @@ class ShortRecipeSerializer(GETRecipeSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time',
         )
 
 
-class FollowSerializer(ModelSerializer, IsSubscriberMixin):
-    email = EmailField(
-        source='subscribed_to.email',
-        read_only=True
-    )
-    id = IntegerField(
-        source='subscribed_to.id',
-        read_only=True
-    )
-    username = CharField(
-        source='subscribed_to.username',
-        read_only=True
-    )
-    first_name = CharField(
-        source='subscribed_to.first_name',
-        read_only=True
-    )
-    last_name = CharField(
-        source='subscribed_to.last_name',
-        read_only=True
-    )
-    is_subscribed = SerializerMethodField()
+class FollowSerializer(CustomUserSerializer):
     recipes = SerializerMethodField()
-    recipes_count = SerializerMethodField()
+    recipes_count = ReadOnlyField()
 
-    class Meta:
-        model = Follow
-        fields = (
-            'email',
-            'id',
-            'username',
-            'first_name',
-            'last_name',
-            'is_subscribed',
+    class Meta(CustomUserSerializer.Meta):
+        fields = CustomUserSerializer.Meta.fields + (
             'recipes',
             'recipes_count',
         )
 
-    def get_is_subscribed(self, follow_obj):
-        return self.is_subscribed(follow_obj.subscribed_to)
+    @cached_property
+    def recipes_serializer(self):
+        # One serializer for the previews of every author on the page.
+        return ShortRecipeSerializer(many=True)
 
-    def get_recipes(self, follow_object):
-        request = self.context.get('request')
-        recipes = Recipe.objects.filter(
-            author=follow_object.subscribed_to
+    def get_recipes(self, author):
+        previews = self.context.get('recipe_previews')
+        if previews is None:
+            previews = Recipe.objects.previews(
+                (author.id,), self.context.get('recipes_limit')
+            )
+        return self.recipes_serializer.to_representation(
+            previews.get(author.id, ())
         )
-        if 'recipes_limit' in request.GET:
-            recipes = recipes[:int(request.GET['recipes_limit'])]
-        return ShortRecipeSerializer(
-            recipes,
-            many=True
-        ).data
 
-    def get_recipes_count(self, follow_object):
-        return Recipe.objects.filter(
-            author=follow_object.subscribed_to
-        ).count()
+
+class CookableRecipeSerializer(GETRecipeSerializer):
+    missing_count = ReadOnlyField()
+
+    class Meta(GETRecipeSerializer.Meta):
+        fields = GETRecipeSerializer.Meta.fields + ('missing_count',)
+
+
+class CookableParamsSerializer(Serializer):
+    ingredients = ListField(
+        child=IntegerField(),
+        min_length=1
+    )
+    max_missing = IntegerField(
+        min_value=0,
+        required=False
+    )
+
+
+class BulkRecipesSerializer(Serializer):
+    recipes = ListField(
+        child=IntegerField(),
+        min_length=1,
+        max_length=settings.BULK_RECIPES_LIMIT
+    )
+
+
+class ServingsSerializer(Serializer):
+    servings = IntegerField(
+        min_value=settings.MIN_SERVINGS,
+        max_value=settings.MAX_SERVINGS
+    )
+
+
+class ShoppingCartParamsSerializer(ServingsSerializer):
+    servings = IntegerField(
+        min_value=settings.MIN_SERVINGS,
+        max_value=settings.MAX_SERVINGS,
+        default=1
+    )
+
+
+class SubscriptionsParamsSerializer(Serializer):
+    recipes_limit = IntegerField(
+        min_value=0,
+        required=False
+    )
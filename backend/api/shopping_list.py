@@ -0,0 +1,95 @@
+import csv
+import io
+
+from django.conf import settings
+from django.db.models import F, FloatField, Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from foodgram.models import ShoppingListItem
+from foodgram.units import humanize
+
+SHOPPING_LIST_LINE = '{quantity} {measurement_unit} {name}'
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+PDF_TITLE = 'Список покупок'
+PDF_FONT_NAME = 'ShoppingList'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+PDF_LINE_HEIGHT = 18
+
+
+def shopping_list(user):
+    """Yield (name, unit, quantity) lines of the user's shopping list.
+
+    Totals are summed in the database over amounts converted to each
+    ingredient's canonical unit, so "мука, ст. л." and "мука, кг" come
+    out as one line; the total is then rendered in a readable unit.
+    """
+    for name, canonical_unit, quantity in ShoppingListItem.objects.filter(
+        user=user
+    ).values(
+        'ingredient__name', 'ingredient__canonical_unit'
+    ).annotate(
+        quantity=Sum(
+            F('amount') * F('ingredient__unit_factor'),
+            output_field=FloatField()
+        )
+    ).order_by(
+        'ingredient__name', 'ingredient__canonical_unit'
+    ).values_list(
+        'ingredient__name', 'ingredient__canonical_unit', 'quantity'
+    ).iterator(chunk_size=settings.SHOPPING_LIST_CHUNK_SIZE):
+        quantity, measurement_unit = humanize(quantity, canonical_unit)
+        yield name, measurement_unit, quantity
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def export_txt(rows):
+    for name, measurement_unit, quantity in rows:
+        yield SHOPPING_LIST_LINE.format(
+            quantity=quantity,
+            measurement_unit=measurement_unit,
+            name=name
+        ) + '\n'
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for name, measurement_unit, quantity in rows:
+        yield writer.writerow((name, quantity, measurement_unit))
+
+
+def export_pdf(rows):
+    if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+        )
+    buffer = io.BytesIO()
+    canvas = Canvas(buffer, pagesize=A4)
+    width, height = A4
+    canvas.setFont(PDF_FONT_NAME, PDF_FONT_SIZE)
+    canvas.drawString(PDF_MARGIN, height - PDF_MARGIN, PDF_TITLE)
+    y = height - PDF_MARGIN - 2 * PDF_LINE_HEIGHT
+    for line in export_txt(rows):
+        if y < PDF_MARGIN:
+            canvas.showPage()
+            canvas.setFont(PDF_FONT_NAME, PDF_FONT_SIZE)
+            y = height - PDF_MARGIN
+        canvas.drawString(PDF_MARGIN, y, line.rstrip('\n'))
+        y -= PDF_LINE_HEIGHT
+    canvas.save()
+    yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    'txt': ('text/plain; charset=utf-8', export_txt),
+    'csv': ('text/csv; charset=utf-8', export_csv),
+    'pdf': ('application/pdf', export_pdf),
+}
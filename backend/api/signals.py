@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from foodgram.models import Ingredient, Recipe, Tag, User
+from .cache import bump_version
+from .ingredient_index import ingredient_index
+from .recipe_matcher import recipe_changed
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def bump_response_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def publish_recipe_change(sender, instance, **kwargs):
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: recipe_changed(recipe_id))
+
+
+@receiver(post_delete, sender=Token)
+def expire_deleted_token(**kwargs):
+    # djoser's token/logout deletes the user's tokens.
+    transaction.on_commit(lambda: bump_version(Token))
+
+
+@receiver(post_save, sender=User)
+def expire_user_tokens(created, update_fields, **kwargs):
+    # Password changes, deactivation and profile edits all go through
+    # save(); only the last_login update on every login is harmless.
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    transaction.on_commit(lambda: bump_version(Token))
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.core.handlers.asgi import ASGIHandler as DjangoASGIHandler
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import SimpleTestCase, override_settings
+from django.urls import path
+
+from api import async_views
+from api.async_views import ASGIHandler, async_read_view
+
+CHUNKS = 5
+
+
+class State:
+    def __init__(self):
+        self.headers_sent = threading.Event()
+        self.threads = set()
+        self.produced = 0
+
+
+state = State()
+
+
+def streaming_view(request):
+    def content():
+        yield 'first\n'
+        # Buffering the body would wait here for headers never sent.
+        if not state.headers_sent.wait(5):
+            raise AssertionError('the body was buffered')
+        for number in range(CHUNKS):
+            state.threads.add(threading.get_ident())
+            state.produced += 1
+            yield f'{number}\n'
+    return StreamingHttpResponse(content())
+
+
+def endless_view(request):
+    def content():
+        while True:
+            state.produced += 1
+            yield 'chunk\n'
+    return StreamingHttpResponse(content())
+
+
+urlpatterns = [
+    path('stream/', async_read_view(streaming_view)),
+    path('endless/', async_read_view(endless_view)),
+    path('plain/', async_read_view(lambda request: HttpResponse('plain'))),
+]
+
+
+class ClientGone(Exception):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadViewTest(SimpleTestCase):
+    def setUp(self):
+        global state
+        state = State()
+
+    async def get(self, url, handler_class=ASGIHandler, body_limit=None):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                state.headers_sent.set()
+            elif body_limit is not None and len(messages) > body_limit:
+                raise ClientGone
+            messages.append(message)
+
+        await handler_class()({
+            'type': 'http', 'method': 'GET', 'path': url,
+            'query_string': b'', 'headers': [(b'host', b'testserver')],
+        }, receive, send)
+        return messages
+
+    def body(self, messages):
+        return b''.join(message.get('body', b'') for message in messages)
+
+    async def test_streams_from_the_pool_thread(self):
+        messages = await self.get('/stream/')
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertEqual(
+            self.body(messages),
+            b'first\n' + b''.join(
+                f'{number}\n'.encode() for number in range(CHUNKS)
+            )
+        )
+        self.assertEqual(messages[-1], {'type': 'http.response.body'})
+        self.assertEqual(len(state.threads), 1)
+        self.assertNotIn(threading.get_ident(), state.threads)
+
+    async def test_other_responses(self):
+        self.assertEqual(self.body(await self.get('/plain/')), b'plain')
+        # Handlers that only iterate synchronously still get the body.
+        self.assertEqual(
+            self.body(await self.get('/stream/', DjangoASGIHandler)),
+            b'first\n0\n1\n2\n3\n4\n'
+        )
+
+    async def test_client_gone_stops_the_producer(self):
+        with mock.patch.object(async_views, 'STREAM_PUT_TIMEOUT', 0.01):
+            with self.assertRaises(ClientGone):
+                await self.get('/endless/', body_limit=3)
+            await asyncio.sleep(0.1)
+            produced = state.produced
+            await asyncio.sleep(0.1)
+        self.assertEqual(state.produced, produced)
+        self.assertLess(produced, 20)
@@ -0,0 +1,68 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.tests.utils import create_user
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        token_cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def me(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('users-me'))
+        return response, len(queries)
+
+    def test_cache_hit_skips_the_token_query(self):
+        response, first = self.me()
+        self.assertEqual(response.status_code, 200)
+        response, second = self.me()
+        self.assertEqual(response.json()['id'], self.user.id)
+        self.assertEqual(second, first - 1)
+
+    def test_logout_expires_the_token(self):
+        self.me()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(
+                self.client.post(reverse('logout')).status_code, 204
+            )
+        self.assertEqual(self.me()[0].status_code, 401)
+
+    def test_user_changes_expire_cached_users(self):
+        self.me()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('users-set-password'), {
+                'current_password': 'password',
+                'new_password': 'another-Password-1',
+            })
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(token_cache.get(self.token.key)[1])
+        self.me()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.me()[0].status_code, 401)
+
+    def test_login_keeps_cached_users(self):
+        self.me()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post(reverse('login'), {
+                'email': self.user.email, 'password': 'password'
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(token_cache.get(self.token.key)[1])
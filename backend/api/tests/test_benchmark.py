@@ -0,0 +1,40 @@
+import io
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from foodgram.management.commands.benchmark_api import BUDGET_PATH, Command
+
+
+class QueryBudgetTest(TestCase):
+    def test_benchmark_respects_query_budget(self):
+        # The command sets up the test environment itself, as it does
+        # when run from manage.py.
+        teardown_test_environment()
+        try:
+            call_command('benchmark_api', '--check', '--repeat', '1',
+                         stdout=io.StringIO(), stderr=io.StringIO())
+        finally:
+            setup_test_environment()
+
+
+class CheckBudgetTest(SimpleTestCase):
+    def check(self, status, queries):
+        Command(stdout=io.StringIO()).check_budget(
+            [{'endpoint': 'GET tags-list (anonymous)',
+              'status': status, 'queries': queries}],
+            BUDGET_PATH
+        )
+
+    def test_within_budget(self):
+        self.check(200, 0)
+
+    def test_over_budget(self):
+        with self.assertRaisesMessage(CommandError, 'budget'):
+            self.check(200, 100)
+
+    def test_error_status_fails_under_budget(self):
+        with self.assertRaisesMessage(CommandError, 'status 500'):
+            self.check(500, 0)
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import FavoriteRecipe, RecipeShoppingCart
+from foodgram.tests.utils import create_recipe, create_user
+
+MISSING_ID = 10 ** 6
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class BulkSectionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        author = create_user()
+        cls.recipes = [create_recipe(author) for _ in range(3)]
+        FavoriteRecipe.objects.create(user=cls.user, recipe=cls.recipes[0])
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, method, url_name, recipe_ids):
+        response = getattr(self.client, method)(
+            reverse(url_name), {'recipes': recipe_ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [(item['id'], item['status']) for item in response.json()]
+
+    def test_add_reports_each_recipe(self):
+        first, second, _ = self.recipes
+        self.assertEqual(
+            self.bulk('post', 'recipes-favorite-bulk',
+                      [second.id, first.id, MISSING_ID, second.id]),
+            [(second.id, 'added'), (first.id, 'already_added'),
+             (MISSING_ID, 'not_found')]
+        )
+        self.assertEqual(
+            set(FavoriteRecipe.objects.filter(
+                user=self.user
+            ).values_list('recipe_id', flat=True)),
+            {first.id, second.id}
+        )
+
+    def test_delete_reports_each_recipe(self):
+        first, second, _ = self.recipes
+        self.assertEqual(
+            self.bulk('delete', 'recipes-favorite-bulk',
+                      [first.id, second.id]),
+            [(first.id, 'removed'), (second.id, 'not_added')]
+        )
+        self.assertFalse(FavoriteRecipe.objects.exists())
+
+    def test_cart(self):
+        ids = [recipe.id for recipe in self.recipes]
+        self.bulk('post', 'recipes-shopping-cart-bulk', ids)
+        self.assertEqual(
+            RecipeShoppingCart.objects.filter(user=self.user).count(), 3
+        )
+        self.bulk('delete', 'recipes-shopping-cart-bulk', ids)
+        self.assertFalse(RecipeShoppingCart.objects.exists())
+
+    def test_invalid_requests(self):
+        url = reverse('recipes-favorite-bulk')
+        for data in ({'recipes': []}, {},
+                     {'recipes': [1] * (settings.BULK_RECIPES_LIMIT + 1)}):
+            self.assertEqual(
+                self.client.post(url, data, format='json').status_code, 400
+            )
+        self.assertEqual(
+            APIClient().post(url, {'recipes': [1]},
+                             format='json').status_code,
+            401
+        )
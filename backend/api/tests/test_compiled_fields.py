@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.fields import CharField, IntegerField, ReadOnlyField
+from rest_framework.request import Request
+from rest_framework.serializers import Serializer
+from rest_framework.test import APIRequestFactory
+
+from api.mixins import CompiledFieldsMixin
+from api.serializers import (CustomUserSerializer, FollowSerializer,
+                             GETRecipeSerializer, IngredientSerializer,
+                             ShortRecipeSerializer, TagSerializer)
+from foodgram.models import Follow, Ingredient, Recipe, Tag, User
+from foodgram.tests.utils import (create_ingredient, create_recipe,
+                                  create_tag, create_user)
+
+
+def uncompiled(make_serializer):
+    # DRF's own field machinery, nested serializers included.
+    with mock.patch.object(
+        CompiledFieldsMixin, 'to_representation',
+        Serializer.to_representation
+    ):
+        return make_serializer().data
+
+
+class SourcesSerializer(Serializer):
+    first_name = CharField(source='author.first_name', read_only=True)
+    last_name = CharField(source='author.last_name', allow_null=True)
+    email = CharField(source='author.email', default='нет')
+    count = IntegerField(source='get_count')
+    value = ReadOnlyField(source='data.key')
+
+
+class CompiledSourcesSerializer(CompiledFieldsMixin, SourcesSerializer):
+    pass
+
+
+class RequiredSourceSerializer(Serializer):
+    username = CharField(source='author.username')
+
+
+class CompiledRequiredSourceSerializer(CompiledFieldsMixin,
+                                       RequiredSourceSerializer):
+    pass
+
+
+class CompiledFieldsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        author = create_user(first_name='Автор')
+        Follow.objects.create(subscriber=cls.user, subscribed_to=author)
+        ingredients = [create_ingredient() for _ in range(3)]
+        tags = [create_tag() for _ in range(2)]
+        create_recipe(author, ingredients, tags=tags)
+        create_recipe(
+            author, ingredients[:1], image='foodgram/images/с пробелом.png',
+            image_variants={'small': {'webp': 'variants/a b.webp'}}
+        )
+        create_recipe(cls.user, image='')
+
+    def setUp(self):
+        self.request = Request(APIRequestFactory().get('/api/recipes/'))
+        self.request.user = self.user
+
+    def assertSameOutput(self, make_serializer):
+        self.assertEqual(make_serializer().data, uncompiled(make_serializer))
+
+    def test_api_serializers(self):
+        context = {'request': self.request}
+        recipes = Recipe.objects.for_detail(self.user).order_by('id')
+        for make_serializer in (
+            lambda: GETRecipeSerializer(recipes, many=True, context=context),
+            lambda: ShortRecipeSerializer(recipes, many=True, context={}),
+            lambda: CustomUserSerializer(
+                User.objects.order_by('id'), many=True, context=context
+            ),
+            lambda: FollowSerializer(
+                User.objects.order_by('id'), many=True, context=context
+            ),
+            lambda: TagSerializer(Tag.objects.all(), many=True),
+            lambda: IngredientSerializer(Ingredient.objects.all(), many=True),
+        ):
+            with self.subTest(serializer=type(make_serializer().child)):
+                self.assertSameOutput(make_serializer)
+
+    def test_sources(self):
+        for instance in (
+            SimpleNamespace(
+                author=SimpleNamespace(
+                    first_name='Имя', last_name='Фамилия', email='a@b.c'
+                ),
+                get_count=lambda: 3,
+                data={'key': 'значение'},
+            ),
+            SimpleNamespace(author=None, get_count=lambda: 0, data={}),
+        ):
+            with self.subTest(instance=instance):
+                compiled = CompiledSourcesSerializer(instance).data
+                self.assertEqual(
+                    compiled, SourcesSerializer(instance).data
+                )
+        self.assertEqual(
+            compiled, {'last_name': None, 'email': 'нет', 'count': 0}
+        )
+        for serializer_class in (
+            RequiredSourceSerializer, CompiledRequiredSourceSerializer
+        ):
+            with self.assertRaises(AttributeError):
+                serializer_class(SimpleNamespace(author=None)).data
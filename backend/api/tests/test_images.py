@@ -0,0 +1,110 @@
+import base64
+import io
+import tempfile
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.fields import Base64ImageField, decode_base64
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import Recipe
+from foodgram.tests.utils import create_ingredient, create_tag, create_user
+
+
+def image_data(color='red', size=(300, 300), image_format='BMP', wrap=False):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=image_format)
+    encode = base64.encodebytes if wrap else base64.b64encode
+    return (
+        f'data:image/{image_format.lower()};base64,'
+        + encode(buffer.getvalue()).decode()
+    )
+
+
+class Base64ImageFieldTest(SimpleTestCase):
+    def test_line_wrapped_base64(self):
+        data = image_data(wrap=True)
+        self.assertIn('\n', data)
+        image = Base64ImageField().to_internal_value(data)
+        self.assertEqual(image.image.size, (300, 300))
+
+    def test_chunks_split_groups_and_line_breaks(self):
+        raw = bytes(range(256)) * 5
+        for encoded in (base64.b64encode(raw), base64.encodebytes(raw)):
+            for chunk_size in (1, 7, 77, 1024):
+                with mock.patch('api.fields.BASE64_CHUNK_SIZE', chunk_size):
+                    self.assertEqual(
+                        decode_base64('xx' + encoded.decode(), 2).read(), raw
+                    )
+
+    def test_invalid_data(self):
+        for data in ('data:image/png,AAAA', 'data:image/png;base64,AAA',
+                     'data:image/png;base64,AA!A', 'data:image/png;base64,é'):
+            with self.assertRaises(ValidationError):
+                Base64ImageField().to_internal_value(data)
+
+
+@override_settings(CACHES=BENCHMARK_CACHES, IMAGE_WORKERS=0)
+class ImageVariantsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.ingredient = create_ingredient()
+        cls.tag = create_tag()
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media = override_settings(MEDIA_ROOT=media_root.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def recipe_data(self, color):
+        return {
+            'ingredients': [{'id': self.ingredient.id, 'amount': 5}],
+            'tags': [self.tag.id],
+            'image': image_data(color, (40, 20), 'PNG'),
+            'name': 'recipe',
+            'text': 'text',
+            'cooking_time': 5,
+        }
+
+    def variant_names(self, recipe_id):
+        variants = Recipe.objects.get(pk=recipe_id).image_variants
+        names = [
+            name for formats in variants.values()
+            for name in formats.values()
+        ]
+        self.assertTrue(names)
+        return names
+
+    def test_replaced_variants_are_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('recipes-list'), self.recipe_data('red'),
+                format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        recipe_id = response.json()['id']
+        old = self.variant_names(recipe_id)
+        self.assertTrue(all(default_storage.exists(name) for name in old))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse('recipes-detail', kwargs={'id': recipe_id}),
+                self.recipe_data('blue'), format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        new = self.variant_names(recipe_id)
+        self.assertFalse(set(old) & set(new))
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+        self.assertTrue(all(default_storage.exists(name) for name in new))
@@ -0,0 +1,48 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.ingredient_index import IngredientIndex, ingredient_index
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import Ingredient
+from foodgram.tests.utils import create_ingredient
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class IngredientSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('морская соль', 'соль', 'солод', 'сахар'):
+            create_ingredient(name)
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        ingredient_index.invalidate()
+        self.client = APIClient()
+
+    def names(self, **params):
+        response = self.client.get(reverse('ingredients-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [ingredient['name'] for ingredient in response.json()]
+
+    def test_prefix_matches_come_before_substring_matches(self):
+        self.assertEqual(
+            self.names(name='Сол'), ['солод', 'соль', 'морская соль']
+        )
+
+    @override_settings(INGREDIENT_INDEX_TTL=0)
+    def test_database_path_returns_prefix_matches(self):
+        self.assertEqual(sorted(self.names(name='сол')), ['солод', 'соль'])
+
+    def test_new_ingredient_is_found(self):
+        self.assertEqual(self.names(name='пер'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ingredient('перец')
+        self.assertEqual(self.names(name='пер'), ['перец'])
+
+    def test_warm_up_builds_the_index(self):
+        index = IngredientIndex()
+        index.load()
+        self.assertEqual(len(index.entries), Ingredient.objects.count())
@@ -0,0 +1,66 @@
+import warnings
+
+from django.core.cache import caches
+from django.core.paginator import UnorderedObjectListWarning
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import Follow
+from foodgram.tests.utils import create_recipe, create_user
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.authors = [create_user() for _ in range(5)]
+        for author in cls.authors:
+            create_recipe(author)
+            Follow.objects.create(subscriber=cls.user, subscribed_to=author)
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, params):
+        """Ids of every page, following the next links."""
+        response = self.client.get(url, params)
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertNotIn('count', page)
+            ids += [item['id'] for item in page['results']]
+            if page['next'] is None:
+                return ids
+            response = self.client.get(page['next'])
+
+    def page_ids(self, url, params):
+        return [
+            item['id']
+            for item in self.client.get(url, params).json()['results']
+        ]
+
+    def test_recipe_cursor_pages_match_page_numbers(self):
+        url = reverse('recipes-list')
+        self.assertEqual(
+            self.walk(url, {'cursor': '', 'limit': 2}),
+            self.page_ids(url, {'limit': 10})
+        )
+
+    def test_subscription_cursor_pages_match_page_numbers(self):
+        url = reverse('users-subscriptions')
+        ids = self.walk(url, {'cursor': '', 'limit': 2})
+        self.assertEqual(ids, self.page_ids(url, {'limit': 10}))
+        self.assertEqual(ids, [author.id for author in self.authors])
+
+    def test_users_are_paginated_in_id_order(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            ids = self.page_ids(reverse('users-list'), {'limit': 10})
+        self.assertEqual(ids, sorted(ids))
@@ -0,0 +1,108 @@
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.cache import LockingFileBasedCache
+from api.recipe_matcher import RecipeMatcher, recipe_changed
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import IngredientAmountForRecipe
+from foodgram.tests.utils import (create_ingredient, create_recipe,
+                                  create_user)
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class RecipeMatcherTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user()
+        cls.ingredients = [create_ingredient() for _ in range(4)]
+        first, second, third, fourth = cls.ingredients
+        cls.exact = create_recipe(author, (first, second))
+        cls.one_missing = create_recipe(author, (first, second, third))
+        cls.unrelated = create_recipe(author, (fourth,))
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.matcher = RecipeMatcher()
+
+    def ids(self, *ingredients):
+        return [ingredient.id for ingredient in ingredients]
+
+    def test_fewest_missing_first(self):
+        first, second, _, _ = self.ingredients
+        self.assertEqual(
+            self.matcher.match(self.ids(first, second)),
+            [(self.exact.id, 0), (self.one_missing.id, 1)]
+        )
+        self.assertEqual(
+            self.matcher.match(self.ids(first, second), max_missing=0),
+            [(self.exact.id, 0)]
+        )
+
+    def test_changes_are_replayed_without_rebuild(self):
+        first, _, _, fourth = self.ingredients
+        self.matcher.load()
+        IngredientAmountForRecipe.objects.create(
+            recipe=self.unrelated, ingredient=first, amount=1
+        )
+        recipe_changed(self.unrelated.id)
+        with mock.patch.object(
+                self.matcher, 'rebuild', wraps=self.matcher.rebuild
+        ) as rebuild:
+            self.assertEqual(
+                self.matcher.match(self.ids(first, fourth)),
+                [(self.unrelated.id, 0), (self.exact.id, 1),
+                 (self.one_missing.id, 2)]
+            )
+        rebuild.assert_not_called()
+
+    def test_gap_in_change_log_rebuilds(self):
+        first = self.ingredients[0]
+        self.matcher.load()
+        IngredientAmountForRecipe.objects.create(
+            recipe=self.unrelated, ingredient=first, amount=1
+        )
+        recipe_changed(self.unrelated.id)
+        caches['state'].clear()
+        self.assertIn(
+            (self.unrelated.id, 1), self.matcher.match(self.ids(first))
+        )
+
+    def test_cookable_endpoint(self):
+        first, second, _, _ = self.ingredients
+        with mock.patch('api.views.recipe_matcher', self.matcher):
+            response = APIClient().get(
+                reverse('recipes-cookable'),
+                {'ingredients': self.ids(first, second)}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(recipe['id'], recipe['missing_count'])
+             for recipe in response.json()['results']],
+            [(self.exact.id, 0), (self.one_missing.id, 1)]
+        )
+
+
+class LockingFileBasedCacheTest(SimpleTestCase):
+    def test_concurrent_increments_are_not_lost(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = LockingFileBasedCache(directory.name, {})
+        cache.set('counter', 0)
+
+        def increment():
+            for _ in range(50):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.get('counter'), 200)
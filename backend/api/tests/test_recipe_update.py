@@ -0,0 +1,111 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import (IngredientAmountForRecipe, Recipe,
+                             RecipeShoppingCart, ShoppingListItem)
+from foodgram.tests.utils import (create_ingredient, create_recipe,
+                                  create_tag, create_user)
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class RecipeUpdateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user()
+        cls.ingredients = [create_ingredient() for _ in range(4)]
+        cls.tags = [create_tag() for _ in range(3)]
+        cls.recipe = create_recipe(
+            cls.author, cls.ingredients[:3], tags=cls.tags[:2]
+        )
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = reverse('recipes-detail', kwargs={'id': self.recipe.id})
+
+    def patch(self, amounts, tags):
+        return self.client.patch(self.url, {
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient, amount in amounts
+            ],
+            'tags': [tag.id for tag in tags],
+            'name': 'recipe',
+            'text': 'text',
+            'cooking_time': 5,
+        }, format='json')
+
+    def rows(self):
+        return {
+            row.ingredient_id: (row.id, row.amount)
+            for row in IngredientAmountForRecipe.objects.filter(
+                recipe=self.recipe
+            )
+        }
+
+    def test_only_changed_ingredients_are_written(self):
+        before = self.rows()
+        ingredients = self.ingredients
+        response = self.patch(
+            [(ingredients[0], 10), (ingredients[1], 20),
+             (ingredients[3], 30)],
+            self.tags[:2]
+        )
+        self.assertEqual(response.status_code, 200)
+        after = self.rows()
+        self.assertEqual(
+            {ingredient_id: amount
+             for ingredient_id, (_, amount) in after.items()},
+            {ingredients[0].id: 10, ingredients[1].id: 20,
+             ingredients[3].id: 30}
+        )
+        # Kept rows are updated in place, not recreated.
+        self.assertEqual(after[ingredients[0].id], before[ingredients[0].id])
+        self.assertEqual(after[ingredients[1].id][0],
+                         before[ingredients[1].id][0])
+
+    def test_tags_are_diffed(self):
+        RecipeTag = Recipe.tags.through
+        kept = RecipeTag.objects.get(recipe=self.recipe, tag=self.tags[1])
+        response = self.patch(
+            [(self.ingredients[0], 10)], self.tags[1:]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(tag['id'] for tag in response.json()['tags']),
+            [tag.id for tag in self.tags[1:]]
+        )
+        self.assertTrue(RecipeTag.objects.filter(pk=kept.pk).exists())
+
+    def test_carts_follow_the_new_amounts(self):
+        user = create_user()
+        RecipeShoppingCart.objects.create(user=user, recipe=self.recipe)
+        self.patch([(self.ingredients[0], 15), (self.ingredients[3], 5)],
+                   self.tags[:1])
+        self.assertEqual(
+            dict(ShoppingListItem.objects.filter(user=user).values_list(
+                'ingredient_id', 'amount'
+            )),
+            {self.ingredients[0].id: 15, self.ingredients[3].id: 5}
+        )
+
+    def test_missing_and_repeated_ids_are_rejected(self):
+        response = self.patch([(self.ingredients[0], 10)], self.tags[:1])
+        self.assertEqual(response.status_code, 200)
+        missing = self.client.patch(self.url, {
+            'ingredients': [{'id': 10 ** 6, 'amount': 1}],
+            'tags': [self.tags[0].id],
+        }, format='json')
+        self.assertEqual(missing.status_code, 400)
+        self.assertIn(str(10 ** 6), str(missing.json()))
+        repeated = self.patch(
+            [(self.ingredients[0], 1), (self.ingredients[0], 2)],
+            self.tags[:1]
+        )
+        self.assertEqual(repeated.status_code, 400)
+        self.assertEqual(set(self.rows()), {self.ingredients[0].id})
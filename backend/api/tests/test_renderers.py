@@ -0,0 +1,109 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.renderers import ORJSONRenderer
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.tests.utils import create_user
+
+PAYLOADS = (
+    {},
+    [],
+    'строка',
+    {'text': 'a\u2028b\u2029c\x00\x1f\x7f "\\/ 😀', 'empty': ''},
+    {'id': 1, 'flag': True, 'none': None, 'negative': -2 ** 63},
+    {0: ['Введите правильное число.'], 1.5: 'float key', None: 'null'},
+    {'floats': [0.1, 1 / 3, 100.0, -0.0, 123456789.123, 1e15]},
+    {'nested': [{'a': [1, (2, 3)]}, {'b': {'c': None}}]},
+    {
+        'aware': datetime.datetime(
+            2026, 10, 18, 9, 41, 5, 123456, tzinfo=timezone.utc
+        ),
+        'naive': datetime.datetime(2026, 10, 18, 9, 41),
+        'date': datetime.date(2026, 10, 18),
+        'time': datetime.time(9, 41, 5, 500),
+        'duration': datetime.timedelta(minutes=5),
+    },
+    {
+        'decimal': Decimal('1.10'),
+        'uuid': uuid.UUID(int=1),
+        'lazy': gettext_lazy('Рецепт'),
+        'bytes': b'bytes',
+        'set': {1},
+        'big': 2 ** 70,
+    },
+)
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    def test_same_bytes_as_json_renderer(self):
+        for data in PAYLOADS:
+            with self.subTest(data=data):
+                self.assertEqual(
+                    ORJSONRenderer().render(data),
+                    JSONRenderer().render(data)
+                )
+
+    def test_exponent_floats_have_the_same_value(self):
+        data = [1e16, 1e-07, 2.5e-05, 1.7976931348623157e308]
+        rendered = ORJSONRenderer().render(data)
+        self.assertNotEqual(rendered, JSONRenderer().render(data))
+        self.assertEqual(json.loads(rendered), data)
+
+    def test_indent(self):
+        data = {'a': [1, {'b': 'строка\u2028'}]}
+        for media_type, context in (
+            ('application/json; indent=4', None),
+            ('application/json', {'indent': 2}),
+        ):
+            with self.subTest(media_type=media_type, context=context):
+                self.assertEqual(
+                    ORJSONRenderer().render(data, media_type, context),
+                    JSONRenderer().render(data, media_type, context)
+                )
+
+    def test_none(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class APIProfileTest(TestCase):
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.user = create_user(is_staff=True, is_superuser=True)
+
+    def test_validation_errors_with_index_keys(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            reverse('recipes-favorite-bulk'),
+            {'recipes': [1, 'x']}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'recipes': {'1': ['Введите правильное число.']}}
+        )
+
+    def test_api_skips_session_middleware(self):
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.get(reverse('users-me'))
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('sessionid', response.cookies)
+        response = client.post(reverse('login'), {
+            'email': self.user.email, 'password': 'password'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get('/admin/').status_code, 200)
+        self.assertEqual(client.post('/admin/logout/').status_code, 403)
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.cache import bump_version, get_version, version_key
+from api.db import ReplicaRouter, pin_key, replica
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import Recipe, Tag
+from foodgram.tests.utils import create_recipe, create_user
+
+
+# 'default' doubles as the replica: reads are routed, the data is there.
+@override_settings(CACHES=BENCHMARK_CACHES, DATABASE_REPLICAS=['default'])
+class ReplicaReadsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.recipe = create_recipe(create_user())
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.routed = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            database = db_for_read(router, model, **hints)
+            self.routed.append((model, database))
+            return database
+        patcher = mock.patch.object(ReplicaRouter, 'db_for_read', record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def recipe_reads(self):
+        return {database for model, database in self.routed
+                if model is Recipe}
+
+    def test_reads_use_the_replica_for_one_request(self):
+        response = self.client.get(reverse('recipes-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.recipe_reads(), {'default'})
+        self.assertIsNone(replica.get())
+        self.routed.clear()
+        Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(self.recipe_reads(), {None})
+
+    def test_tokens_are_read_from_the_primary(self):
+        token = replica.set('default')
+        try:
+            self.assertIsNone(ReplicaRouter().db_for_read(Token))
+            self.assertEqual(ReplicaRouter().db_for_read(Recipe), 'default')
+        finally:
+            replica.reset(token)
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        url = reverse('recipes-favorite', kwargs={'id': self.recipe.id})
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertTrue(caches['state'].get(pin_key(self.user)))
+        self.routed.clear()
+        self.client.get(reverse('recipes-list'))
+        self.assertEqual(self.recipe_reads(), {None})
+        self.routed.clear()
+        APIClient().get(reverse('recipes-list'))
+        self.assertEqual(self.recipe_reads(), {'default'})
+
+    def test_failed_writes_do_not_pin(self):
+        url = reverse('recipes-favorite', kwargs={'id': 10 ** 6})
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertIsNone(caches['state'].get(pin_key(self.user)))
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class StateCacheTest(TestCase):
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+
+    def test_versions_survive_cached_responses(self):
+        version = get_version(Tag)
+        self.assertEqual(bump_version(Tag), version + 1)
+        self.assertIsNone(caches['default'].get(version_key(Tag)))
+        caches['default'].set_many({
+            f'response-{number}': b'{}' for number in range(1000)
+        })
+        caches['default'].clear()
+        self.assertEqual(get_version(Tag), version + 1)
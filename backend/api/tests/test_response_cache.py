@@ -0,0 +1,42 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.tests.utils import create_ingredient, create_tag
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class ResponseCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = create_tag()
+        create_ingredient('соль')
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+
+    def test_unread_query_parameters_share_an_entry(self):
+        url = reverse('ingredients-list')
+        for query in ('', '?a=1', '?b=2&c=3'):
+            self.assertEqual(self.client.get(url + query).status_code, 200)
+        self.client.get(url, {'name': 'со'})
+        self.client.get(url, {'name': 'со', 'page': 5})
+        self.assertEqual(len(caches['default']._cache), 2)
+
+    def test_write_invalidates_cached_list(self):
+        url = reverse('tags-list')
+        self.assertEqual(len(self.client.get(url).json()), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_tag()
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+    def test_etag_answers_not_modified(self):
+        url = reverse('tags-detail', kwargs={'pk': self.tag.pk})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
@@ -0,0 +1,65 @@
+from unittest import skipIf
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.tests.utils import create_recipe, create_user
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class RecipeSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user()
+        cls.in_text = create_recipe(
+            author, name='Суп', text='Борщ без свёклы не бывает'
+        )
+        cls.in_name = create_recipe(
+            author, name='Борщ украинский', text='Варить долго'
+        )
+        cls.other = create_recipe(author, name='Блины', text='Мука, молоко')
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+
+    def search(self, value, **params):
+        response = self.client.get(
+            reverse('recipes-list'), {'search': value, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_name_matches_rank_first(self):
+        self.assertEqual(
+            self.search('борщ'), [self.in_name.id, self.in_text.id]
+        )
+
+    @skipIf(connection.vendor == 'postgresql',
+            'websearch_to_tsquery matches whole words')
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self.search('бли'), [self.other.id])
+
+    def test_query_syntax_is_not_interpreted(self):
+        for value in ('"', 'борщ OR блины', 'NEAR(борщ', '*', '-'):
+            self.search(value)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.other.name = 'Оладьи'
+        self.other.save()
+        self.assertEqual(self.search('блины'), [])
+        self.assertEqual(self.search('оладьи'), [self.other.id])
+        self.in_name.delete()
+        self.assertEqual(self.search('борщ'), [self.in_text.id])
+
+    def test_cursor_is_rejected_with_search(self):
+        response = self.client.get(
+            reverse('recipes-list'), {'search': 'борщ', 'cursor': ''}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
@@ -0,0 +1,114 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import RecipeShoppingCart, ShoppingListItem
+from foodgram.signals import remove_from_shopping_list
+from foodgram.tests.utils import (create_ingredient, create_recipe,
+                                  create_user)
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class ShoppingCartTotalsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.ingredients = [create_ingredient() for _ in range(2)]
+        cls.recipes = [
+            create_recipe(cls.user, cls.ingredients) for _ in range(2)
+        ]
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def totals(self):
+        return dict(ShoppingListItem.objects.filter(
+            user=self.user
+        ).values_list('ingredient_id', 'amount'))
+
+    def cart_url(self, recipe):
+        return reverse('recipes-shopping-cart', kwargs={'id': recipe.id})
+
+    def test_bulk_add_counts_each_recipe_once(self):
+        ids = [recipe.id for recipe in self.recipes]
+        url = reverse('recipes-shopping-cart-bulk')
+        for _ in range(2):
+            self.client.post(url, {'recipes': ids + ids}, format='json')
+        self.assertEqual(
+            self.totals(),
+            {ingredient.id: 20 for ingredient in self.ingredients}
+        )
+
+    def test_delete_twice(self):
+        recipe = self.recipes[0]
+        self.client.post(self.cart_url(recipe))
+        self.client.post(self.cart_url(self.recipes[1]))
+        self.assertEqual(self.client.delete(
+            self.cart_url(recipe)
+        ).status_code, 204)
+        self.assertEqual(self.client.delete(
+            self.cart_url(recipe)
+        ).status_code, 400)
+        self.assertEqual(
+            self.totals(),
+            {ingredient.id: 10 for ingredient in self.ingredients}
+        )
+
+    def test_delete_of_deleted_row_is_skipped(self):
+        self.client.post(self.cart_url(self.recipes[0]))
+        cart = RecipeShoppingCart.objects.get(user=self.user)
+        RecipeShoppingCart.objects.filter(pk=cart.pk).delete()
+        # A second delete of the same row must not subtract it again.
+        remove_from_shopping_list(RecipeShoppingCart, cart)
+        self.assertEqual(self.totals(), {})
+
+    def test_rescale(self):
+        recipe = self.recipes[0]
+        self.client.post(self.cart_url(recipe), {'servings': 3})
+        self.assertEqual(
+            self.totals(),
+            {ingredient.id: 30 for ingredient in self.ingredients}
+        )
+        response = self.client.patch(self.cart_url(recipe), {'servings': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.totals(),
+            {ingredient.id: 20 for ingredient in self.ingredients}
+        )
+        self.assertEqual(self.client.patch(
+            self.cart_url(self.recipes[1]), {'servings': 2}
+        ).status_code, 400)
+
+    def test_recipe_delete_clears_totals(self):
+        self.client.post(self.cart_url(self.recipes[0]))
+        self.recipes[0].delete()
+        self.assertEqual(self.totals(), {})
+
+
+class ReadOnlyAdminTest(TestCase):
+    def test_cart_models_cannot_be_edited(self):
+        admin = create_user(is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        cart = RecipeShoppingCart.objects.create(
+            user=admin, recipe=create_recipe(admin, [create_ingredient()])
+        )
+        for name in ('ingredientamountforrecipe', 'recipeshoppingcart'):
+            self.assertEqual(self.client.get(
+                reverse(f'admin:foodgram_{name}_changelist')
+            ).status_code, 200)
+            self.assertEqual(self.client.get(
+                reverse(f'admin:foodgram_{name}_add')
+            ).status_code, 403)
+        response = self.client.post(
+            reverse('admin:foodgram_recipeshoppingcart_change',
+                    args=(cart.pk,)),
+            {'user': admin.pk, 'recipe': cart.recipe_id, 'servings': 5}
+        )
+        self.assertEqual(response.status_code, 403)
+        cart.refresh_from_db()
+        self.assertEqual(cart.servings, 1)
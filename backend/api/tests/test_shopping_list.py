@@ -0,0 +1,62 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import RecipeShoppingCart
+from foodgram.tests.utils import (create_ingredient, create_recipe,
+                                  create_user)
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class ShoppingListExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        for ingredients, amount in (
+            ([create_ingredient('мука', 'кг'),
+              create_ingredient('яйца', 'шт.')], 1),
+            ([create_ingredient('мука', 'г')], 500),
+            ([create_ingredient('молоко', 'стакан'),
+              create_ingredient('молоко', 'мл')], 100),
+        ):
+            RecipeShoppingCart.objects.create(
+                user=cls.user,
+                recipe=create_recipe(cls.user, ingredients, amount)
+            )
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, file_format):
+        response = self.client.get(
+            reverse('recipes-download-shopping-cart'),
+            {'file_format': file_format}
+        )
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_units_are_summed(self):
+        self.assertEqual(
+            self.download('txt'),
+            '25.85 кг молоко\n'
+            '1.5 кг мука\n'
+            '1 шт. яйца\n'
+        )
+
+    def test_csv(self):
+        self.assertEqual(
+            self.download('csv').splitlines(),
+            ['Ингредиент,Количество,Единица измерения',
+             'молоко,25.85,кг', 'мука,1.5,кг', 'яйца,1,шт.']
+        )
+
+    def test_unknown_format(self):
+        response = self.client.get(
+            reverse('recipes-download-shopping-cart'), {'file_format': 'doc'}
+        )
+        self.assertEqual(response.status_code, 400)
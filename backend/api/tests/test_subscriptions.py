@@ -0,0 +1,74 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import Follow
+from foodgram.tests.utils import create_recipe, create_user
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class SubscriptionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.authors = [create_user() for _ in range(3)]
+        cls.recipes = {
+            author.id: [create_recipe(author) for _ in range(number)]
+            for number, author in enumerate(cls.authors)
+        }
+        for author in cls.authors[1:]:
+            Follow.objects.create(subscriber=cls.user, subscribed_to=author)
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def subscriptions(self, **params):
+        return self.client.get(reverse('users-subscriptions'), params)
+
+    def test_previews_are_the_newest_recipes_up_to_the_limit(self):
+        authors = self.subscriptions(recipes_limit=1).json()['results']
+        self.assertEqual(
+            [author['id'] for author in authors],
+            [author.id for author in self.authors[1:]]
+        )
+        for author in authors:
+            self.assertEqual(
+                [recipe['id'] for recipe in author['recipes']],
+                [self.recipes[author['id']][-1].id]
+            )
+            self.assertEqual(
+                author['recipes_count'], len(self.recipes[author['id']])
+            )
+            self.assertTrue(author['is_subscribed'])
+
+    def test_without_limit_every_recipe_is_previewed(self):
+        authors = self.subscriptions().json()['results']
+        self.assertEqual(
+            [len(author['recipes']) for author in authors], [1, 2]
+        )
+
+    def test_subscribe_response_has_previews(self):
+        author = self.authors[0]
+        create_recipe(author)
+        response = self.client.post(
+            reverse('users-subscribe', kwargs={'id': author.id})
+            + '?recipes_limit=5'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['recipes']), 1)
+
+    def test_invalid_limit(self):
+        for value in ('-1', 'many'):
+            self.assertEqual(
+                self.subscriptions(recipes_limit=value).status_code, 400
+            )
+
+    def test_anonymous(self):
+        self.assertEqual(
+            APIClient().get(reverse('users-subscriptions')).status_code, 401
+        )
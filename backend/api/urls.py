@@ -1,6 +1,8 @@
-from django.urls import include, path
+from django.conf import settings
+from django.urls import URLPattern, include, path
 from rest_framework.routers import SimpleRouter
 
+from .async_views import async_read_view
 from .views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
                     TagViewSet)
 
@@ -26,8 +28,32 @@ router_v1.register(
     basename='users'
 )
 
+ASYNC_READ_ROUTES = (
+    'ingredients-list',
+    'ingredients-detail',
+    'tags-list',
+    'tags-detail',
+    'recipes-list',
+    'recipes-detail',
+    'recipes-feed',
+    'recipes-download-shopping-cart',
+    'users-subscriptions',
+)
+
+
+def async_reads(patterns):
+    if not settings.ASYNC_READ_VIEWS:
+        return patterns
+    return [
+        URLPattern(
+            pattern.pattern, async_read_view(pattern.callback),
+            pattern.default_args, pattern.name
+        ) if pattern.name in ASYNC_READ_ROUTES else pattern
+        for pattern in patterns
+    ]
+
 
 urlpatterns = [
-    path('', include(router_v1.urls)),
+    path('', include(async_reads(router_v1.urls))),
     path('auth/', include('djoser.urls.authtoken'))
 ]
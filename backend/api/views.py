@@ -1,37 +1,66 @@
-from django.db.models import Sum
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, F, Value
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.status import (HTTP_200_OK, HTTP_201_CREATED,
-                                   HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST,
-                                   HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND)
+from rest_framework.status import (HTTP_201_CREATED, HTTP_204_NO_CONTENT,
+                                   HTTP_400_BAD_REQUEST, HTTP_401_UNAUTHORIZED,
+                                   HTTP_404_NOT_FOUND)
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from foodgram.models import (FavoriteRecipe, Follow, Ingredient,
-                             IngredientAmountForRecipe, Recipe,
+from foodgram.models import (FavoriteRecipe, Follow, Ingredient, Recipe,
                              RecipeShoppingCart, Tag, User)
+from foodgram.cart import apply_cart_changes, lock_users
+from foodgram.counters import change_counters, delete_counted
+from foodgram.feed import feed_keys, trim
+from foodgram.recommendations import recommended_ids
 from .filters import RecipeFilter
-from .pagination import PageLimitPagination
+from .ingredient_index import ingredient_index
+from .mixins import ReplicaReadsMixin, VersionedCacheMixin
+from .pagination import (KeysetPagination, PageLimitPagination,
+                         RankedPagination)
 from .permissions import IsOwnerOrReadOnly
-from .serializers import (FollowSerializer, IngredientSerializer,
-                          RecipeSerializer, ShortRecipeSerializer,
-                          TagSerializer)
+from .recipe_matcher import recipe_matcher
+from .serializers import (BulkRecipesSerializer, CookableParamsSerializer,
+                          CookableRecipeSerializer, FollowSerializer,
+                          GETRecipeSerializer, IngredientSerializer,
+                          RecipeSerializer, ServingsSerializer,
+                          ShoppingCartParamsSerializer, ShortRecipeSerializer,
+                          SubscriptionsParamsSerializer, TagSerializer)
+from .shopping_list import EXPORT_FORMATS, shopping_list
 
 CANNOT_FOLLOW_TWICE = 'Нельзя подписаться на одного пользователя дважды'
 CANNOT_FOLLOW_YOURSELF = 'Нельзя подписаться на себя'
 CANNOT_SHOPPING_CARTED_TWICE = 'Нельзя добавить в список покупок дважды'
 CANNOT_FAVORITED_TWICE = 'Нельзя добавть в избранное дважды'
 CANNOT_DELETE_NONE = 'Нельзя удалить пустоту'
+NOT_IN_SHOPPING_CART = 'Рецепта нет в списке покупок'
+UNKNOWN_FILE_FORMAT = 'Неизвестный формат файла, доступны: {formats}'
+SHOPPING_LIST_FILENAME = 'shopping-list'
+ADDED = 'added'
+ALREADY_ADDED = 'already_added'
+NOT_FOUND = 'not_found'
+REMOVED = 'removed'
+NOT_ADDED = 'not_added'
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(ReplicaReadsMixin, UserViewSet):
+    replica_reads = False
     pagination_class = PageLimitPagination
+    cursor_ordering = ('id',)
     http_method_names = ('get', 'post', 'delete')
 
+    def get_queryset(self):
+        return super().get_queryset().with_is_subscribed(
+            self.request.user
+        ).order_by('id')
+
     def get_permissions(self):
         if self.action in ('retrieve', 'list'):
             return (AllowAny(),)
@@ -42,64 +71,97 @@ class CustomUserViewSet(UserViewSet):
         if not self.request.user.is_authenticated:
             return Response(status=HTTP_401_UNAUTHORIZED)
         user = self.request.user
+        if self.request.method == 'DELETE':
+            # delete_counted() locks the row, so of two concurrent
+            # unsubscribes only one decrements followers_count.
+            with transaction.atomic():
+                deleted = delete_counted(Follow.objects.filter(
+                    subscriber=user,
+                    subscribed_to_id=self.kwargs['id']
+                ))
+                for follow in deleted:
+                    trim(follow)
+            if deleted:
+                return Response(status=HTTP_204_NO_CONTENT)
+            get_object_or_404(User, id=self.kwargs['id'])
+            return Response(status=HTTP_400_BAD_REQUEST)
         follow_to = get_object_or_404(
             User,
             id=self.kwargs['id']
         )
-        request_follow = Follow.objects.filter(
-            subscriber=user,
-            subscribed_to=follow_to
-        )
-        if self.request.method == 'POST':
-            if user == follow_to:
-                return Response(
-                    CANNOT_FOLLOW_YOURSELF,
-                    status=HTTP_400_BAD_REQUEST
-                )
-            elif request_follow.exists():
-                return Response(
-                    CANNOT_FOLLOW_TWICE,
-                    status=HTTP_400_BAD_REQUEST
-                    # просит Postman,
-                    # но по факту бессмысленно с UniqueTogether
+        if user == follow_to:
+            return Response(
+                CANNOT_FOLLOW_YOURSELF,
+                status=HTTP_400_BAD_REQUEST
+            )
+        params = SubscriptionsParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                Follow.objects.create(
+                    subscriber=user,
+                    subscribed_to=follow_to
                 )
+        except IntegrityError:
             return Response(
-                FollowSerializer(
-                    Follow.objects.create(
-                        subscriber=user,
-                        subscribed_to=follow_to
-                    ),
-                    context={'request': request}
-                ).data,
-                status=HTTP_201_CREATED
+                CANNOT_FOLLOW_TWICE,
+                status=HTTP_400_BAD_REQUEST
             )
-        if request_follow.exists():
-            request_follow.delete()
-            return Response(status=HTTP_204_NO_CONTENT)
-        return Response(status=HTTP_400_BAD_REQUEST)
+        return Response(
+            FollowSerializer(
+                follow_to,
+                context={
+                    'request': request,
+                    'recipes_limit': params.validated_data.get(
+                        'recipes_limit'
+                    ),
+                }
+            ).data,
+            status=HTTP_201_CREATED
+        )
 
     @action(
         detail=False, methods=['GET'],
         pagination_class=PageLimitPagination,
+        permission_classes=(IsAuthenticated,),
+        cursor_ordering=('follow_id',),
     )
     def subscriptions(self, request):
+        params = SubscriptionsParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        authors = self.paginate_queryset(
+            User.objects.filter(
+                subscribed_to__subscriber=request.user,
+            ).annotate(
+                follow_id=F('subscribed_to__id'),
+                is_subscribed=Value(True, output_field=BooleanField()),
+            ).order_by('follow_id')
+        )
         return self.get_paginated_response(FollowSerializer(
-            self.paginate_queryset(
-                Follow.objects.filter(
-                    subscriber_id=self.request.user,
-                )),
-            context={'request': request},
+            authors,
+            context={
+                'request': request,
+                'recipe_previews': Recipe.objects.previews(
+                    [author.id for author in authors],
+                    params.validated_data.get('recipes_limit')
+                ),
+            },
             many=True,
         ).data)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(ReplicaReadsMixin, VersionedCacheMixin,
+                 ReadOnlyModelViewSet):
+    cache_model = Tag
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(ReplicaReadsMixin, VersionedCacheMixin,
+                        ReadOnlyModelViewSet):
+    cache_model = Ingredient
+    cache_params = ('name', 'search')
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny,)
     filter_backends = (SearchFilter,)
@@ -114,10 +176,18 @@ class IngredientViewSet(ReadOnlyModelViewSet):
             queryset = queryset.filter(name__istartswith=name_starts_with)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if (not name or 'search' in request.query_params
+                or not settings.INGREDIENT_INDEX_TTL):
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(
+            request,
+            lambda request: Response(ingredient_index.search(name))
+        )
+
 
-class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all()
-    serializer_class = RecipeSerializer
+class RecipeViewSet(ReplicaReadsMixin, ModelViewSet):
     permission_classes = (IsOwnerOrReadOnly,)
     pagination_class = PageLimitPagination
     http_method_names = ('get', 'post', 'patch', 'delete',)
@@ -125,36 +195,177 @@ class RecipeViewSet(ModelViewSet):
     filterset_class = RecipeFilter
     lookup_field = 'id'
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return Recipe.objects.for_detail(self.request.user)
+        if self.action in ('favorite', 'shopping_cart'):
+            return Recipe.objects.for_preview()
+        return Recipe.objects.select_related('author')
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve'):
+            return GETRecipeSerializer
+        return RecipeSerializer
+
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-    @action(detail=False, methods=['GET'])
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+    @action(
+        detail=False, methods=['GET'],
+        permission_classes=(IsAuthenticated,),
+    )
     def download_shopping_cart(self, request):
-        ingredient_list = IngredientAmountForRecipe.objects.filter(
-            recipe__shopping_carted__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(quantity=Sum('amount'))
-        ingredient_response = []
-        for ingredient in ingredient_list:
-            quantity = ingredient['quantity']
-            measurement_unit = ingredient['ingredient__measurement_unit']
-            name = ingredient['ingredient__name']
-            ingredient_response.append(f'{quantity} {measurement_unit} {name}')
+        file_format = request.query_params.get('file_format', 'txt')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                UNKNOWN_FILE_FORMAT.format(
+                    formats=', '.join(EXPORT_FORMATS)
+                ),
+                status=HTTP_400_BAD_REQUEST
+            )
+        content_type, export = EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            export(shopping_list(request.user)),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{SHOPPING_LIST_FILENAME}.{file_format}"'
+        )
+        return response
 
-        return Response(
-            ingredient_response,
-            content_type='text/plain',
-            status=HTTP_200_OK
+    @action(
+        detail=False, methods=['GET'],
+        pagination_class=RankedPagination,
+    )
+    def cookable(self, request):
+        params = CookableParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        page = self.paginate_queryset(recipe_matcher.match(
+            params.validated_data['ingredients'],
+            params.validated_data.get('max_missing')
+        ))
+        recipes = Recipe.objects.for_detail(request.user).in_bulk(
+            [recipe_id for recipe_id, _ in page]
+        )
+        ranked = []
+        for recipe_id, missing_count in page:
+            if recipe_id in recipes:
+                recipe = recipes[recipe_id]
+                recipe.missing_count = missing_count
+                ranked.append(recipe)
+        return self.get_paginated_response(CookableRecipeSerializer(
+            ranked,
+            context={'request': request},
+            many=True,
+        ).data)
+
+    @action(
+        detail=False, methods=['GET'],
+        pagination_class=KeysetPagination,
+        permission_classes=(IsAuthenticated,),
+    )
+    def feed(self, request):
+        keys = self.paginator.paginate_keys(
+            feed_keys(
+                request.user,
+                self.paginator.get_position(request),
+                self.paginator.get_page_size(request) + 1
+            ),
+            request
         )
+        recipes = Recipe.objects.for_detail(request.user).in_bulk(
+            [recipe_id for _, recipe_id in keys]
+        )
+        return self.get_paginated_response(GETRecipeSerializer(
+            [recipes[recipe_id] for _, recipe_id in keys
+             if recipe_id in recipes],
+            context={'request': request},
+            many=True,
+        ).data)
 
-    @action(detail=True, methods=['POST', 'DELETE'])
+    @action(
+        detail=False, methods=['GET'],
+        pagination_class=RankedPagination,
+        permission_classes=(IsAuthenticated,),
+    )
+    def recommended(self, request):
+        page = self.paginate_queryset(recommended_ids(request.user))
+        recipes = Recipe.objects.for_detail(request.user).in_bulk(page)
+        return self.get_paginated_response(GETRecipeSerializer(
+            [recipes[recipe_id] for recipe_id in page if recipe_id in recipes],
+            context={'request': request},
+            many=True,
+        ).data)
+
+    @action(
+        detail=False, methods=['POST', 'DELETE'],
+        url_path='shopping_cart',
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_bulk(self, request):
+        return self.recipe_section_bulk(RecipeShoppingCart)
+
+    @action(
+        detail=False, methods=['POST', 'DELETE'],
+        url_path='favorite',
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_bulk(self, request):
+        return self.recipe_section_bulk(FavoriteRecipe)
+
+    @action(detail=True, methods=['POST', 'PATCH', 'DELETE'])
     def shopping_cart(self, request, *args, **kwargs):
+        if request.method == 'DELETE':
+            return self.recipe_section(
+                RecipeShoppingCart,
+                CANNOT_SHOPPING_CARTED_TWICE
+            )
+        if request.method == 'PATCH':
+            params = ServingsSerializer(data=request.data)
+            params.is_valid(raise_exception=True)
+            return self.rescale_shopping_cart(
+                params.validated_data['servings']
+            )
+        params = ShoppingCartParamsSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
         return self.recipe_section(
             RecipeShoppingCart,
-            CANNOT_SHOPPING_CARTED_TWICE
+            CANNOT_SHOPPING_CARTED_TWICE,
+            servings=params.validated_data['servings']
         )
 
+    @transaction.atomic
+    def rescale_shopping_cart(self, servings):
+        user = self.request.user
+        try:
+            cart = RecipeShoppingCart.objects.select_related(
+                'recipe'
+            ).select_for_update(of=('self',)).get(
+                user=user,
+                recipe_id=self.kwargs['id']
+            )
+        except RecipeShoppingCart.DoesNotExist:
+            return Response(
+                NOT_IN_SHOPPING_CART,
+                status=HTTP_400_BAD_REQUEST
+            )
+        if cart.servings != servings:
+            apply_cart_changes(
+                user.id, {cart.recipe_id: servings - cart.servings}
+            )
+            cart.servings = servings
+            cart.save(update_fields=('servings',))
+        return Response(ShortRecipeSerializer(cart.recipe).data)
+
     @action(detail=True, methods=['POST', 'DELETE'])
     def favorite(self, request, *args, **kwargs):
         return self.recipe_section(
@@ -162,50 +373,115 @@ class RecipeViewSet(ModelViewSet):
             CANNOT_FAVORITED_TWICE
         )
 
-    def recipe_section(self, SectionModel, answer_if_twice,):
+    def recipe_section(self, SectionModel, answer_if_twice, **fields):
         user = self.request.user
         if not self.request.user.is_authenticated:
             return Response(HTTP_401_UNAUTHORIZED)
+        if self.request.method == 'DELETE':
+            with transaction.atomic():
+                deleted = self.delete_sections(
+                    SectionModel, user, (self.kwargs['id'],)
+                )
+            if deleted:
+                return Response(status=HTTP_204_NO_CONTENT)
+            if not Recipe.objects.filter(id=self.kwargs['id']).exists():
+                return Response(status=HTTP_404_NOT_FOUND)
+            return Response(
+                CANNOT_DELETE_NONE,
+                status=HTTP_400_BAD_REQUEST
+            )
         try:
-            recipe = Recipe.objects.get(
+            recipe = self.get_queryset().get(
                 id=self.kwargs['id']
                 # достаточно get_object_or_404, но Postman требует 400
             )
         except Recipe.DoesNotExist:
-            if self.request.method == 'POST':
-                return Response(
-                    status=HTTP_400_BAD_REQUEST
-                )
             return Response(
-                status=HTTP_404_NOT_FOUND
+                status=HTTP_400_BAD_REQUEST
             )
-        get_section = SectionModel.objects.filter(
-            user=user,
-            recipe=recipe
-        )
-        if self.request.method == 'POST':
-            if get_section.exists():
-                return Response(
-                    answer_if_twice,
-                    status=HTTP_400_BAD_REQUEST
-                    # просит Postman,
-                    # но по факту бессмысленно с UniqueTogether
+        try:
+            with transaction.atomic():
+                # Bulk adds read the user's rows under this lock.
+                lock_users((user.id,))
+                SectionModel.objects.create(
+                    user=user,
+                    recipe=recipe,
+                    **fields
                 )
-            SectionModel.objects.create(
-                user=user,
-                recipe=recipe
-            )
-            recipe_data = ShortRecipeSerializer(
-                recipe
-            ).data
-            return Response(
-                recipe_data,
-                status=HTTP_201_CREATED
-            )
-        if not get_section.exists():
+        except IntegrityError:
             return Response(
-                CANNOT_DELETE_NONE,
+                answer_if_twice,
                 status=HTTP_400_BAD_REQUEST
             )
-        get_section.delete()
-        return Response(status=HTTP_204_NO_CONTENT)
+        return Response(
+            ShortRecipeSerializer(recipe).data,
+            status=HTTP_201_CREATED
+        )
+
+    def delete_sections(self, SectionModel, user, recipe_ids):
+        # Rows are locked and deleted without signals, so a concurrent
+        # DELETE of the same row finds nothing and changes no counter
+        # or shopping list total.
+        deleted = delete_counted(
+            SectionModel.objects.filter(
+                user=user,
+                recipe_id__in=recipe_ids
+            )
+        )
+        if SectionModel is RecipeShoppingCart:
+            apply_cart_changes(user.id, {
+                section.recipe_id: -section.servings
+                for section in deleted
+            })
+        return deleted
+
+    @transaction.atomic
+    def recipe_section_bulk(self, SectionModel):
+        params = BulkRecipesSerializer(data=self.request.data)
+        params.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(params.validated_data['recipes']))
+        user = self.request.user
+        if self.request.method == 'DELETE':
+            deleted = self.delete_sections(SectionModel, user, recipe_ids)
+            removed = {section.recipe_id for section in deleted}
+            statuses = {
+                recipe_id: REMOVED if recipe_id in removed else NOT_ADDED
+                for recipe_id in recipe_ids
+            }
+        else:
+            found = set(Recipe.objects.filter(
+                id__in=recipe_ids
+            ).values_list('id', flat=True))
+            # Serializes concurrent bulk adds of one user: otherwise both
+            # read the same saved set and both count the rows the second
+            # insert skips as added.
+            lock_users((user.id,))
+            saved = set(SectionModel.objects.filter(
+                user=user,
+                recipe_id__in=found
+            ).values_list('recipe_id', flat=True))
+            added = [
+                SectionModel(user=user, recipe_id=recipe_id)
+                for recipe_id in recipe_ids
+                if recipe_id in found and recipe_id not in saved
+            ]
+            SectionModel.objects.bulk_create(added, ignore_conflicts=True)
+            # Every insert of the user's rows holds the user lock, so all
+            # of added is inserted and the conflicts are only a safeguard.
+            change_counters(SectionModel, added, 1)
+            if SectionModel is RecipeShoppingCart:
+                apply_cart_changes(user.id, {
+                    section.recipe_id: section.servings for section in added
+                })
+            statuses = {
+                recipe_id: (
+                    NOT_FOUND if recipe_id not in found
+                    else ALREADY_ADDED if recipe_id in saved
+                    else ADDED
+                )
+                for recipe_id in recipe_ids
+            }
+        return Response([
+            {'id': recipe_id, 'status': status}
+            for recipe_id, status in statuses.items()
+        ])
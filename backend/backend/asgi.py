@@ -1,7 +1,17 @@
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
 
-application = get_asgi_application()
+# get_asgi_application(), with a handler that streams the bodies of
+# views served from the read thread pool.
+django.setup(set_prefix=False)
+
+from api.async_views import ASGIHandler  # noqa: E402
+from api.ingredient_index import ingredient_index  # noqa: E402
+
+application = ASGIHandler()
+
+ingredient_index.warm()
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import csrf
+
+
+class SkipForAPIMixin:
+    """Run the middleware only outside API_URL_PREFIX.
+
+    The API authenticates with tokens and answers JSON, so sessions,
+    request.user from the session, messages and CSRF checks (DRF views
+    are csrf_exempt anyway) are pure overhead there; the admin still
+    gets all of them. Subclassing keeps the admin system checks happy.
+    """
+
+    def __call__(self, request):
+        if request.path_info.startswith(settings.API_URL_PREFIX):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkipForAPIMixin,
+                        sessions_middleware.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipForAPIMixin, csrf.CsrfViewMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(SkipForAPIMixin,
+                               auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SkipForAPIMixin,
+                        messages_middleware.MessageMiddleware):
+    pass
@@ -0,0 +1,41 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend with the CONN_HEALTH_CHECKS of Django 4.1.
+
+    A connection kept by CONN_MAX_AGE is pinged once per request, right
+    before its first query or transaction, and reopened if the server or
+    a proxy dropped it in the meantime. Connections a request does not
+    use are not pinged, and fresh connections never are.
+    """
+
+    health_check_done = False
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # Runs at the start and end of every request.
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None or self.health_check_done
+                or not self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+    def set_autocommit(self, autocommit,
+                       force_begin_transaction_with_broken_autocommit=False):
+        self.close_if_health_check_failed()
+        return super().set_autocommit(
+            autocommit, force_begin_transaction_with_broken_autocommit
+        )
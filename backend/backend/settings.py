@@ -30,16 +30,18 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'backend.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'backend.middleware.CsrfViewMiddleware',
+    'backend.middleware.AuthenticationMiddleware',
+    'backend.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
 
+API_URL_PREFIX = '/api/'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -61,12 +63,19 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 if os.getenv('DATABASES', 'POSTGRES') == 'POSTGRES':
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'backend.postgresql',
             'NAME': os.getenv('POSTGRES_DB', ''),
             'USER': os.getenv('POSTGRES_USER', ''),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
-            'PORT': os.getenv('DB_PORT', 5432)
+            'PORT': os.getenv('DB_PORT', 5432),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': os.getenv(
+                'DB_CONN_HEALTH_CHECKS', 'True'
+            ) == 'True',
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+                'DB_DISABLE_SERVER_SIDE_CURSORS', False
+            ) == 'True',
         }
     }
 else:
@@ -77,6 +86,41 @@ else:
         }
     }
 
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['api.db.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'api.cache.LockingFileBasedCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    # Version counters, the recipe change log and replica pins: entries
+    # that must survive the churn of cached responses.
+    'state': {
+        'BACKEND': os.getenv(
+            'STATE_CACHE_BACKEND',
+            'api.cache.LockingFileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'STATE_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'state')
+        ),
+    },
+}
+if CACHES['state']['BACKEND'] == 'api.cache.LockingFileBasedCache':
+    CACHES['state']['OPTIONS'] = {'MAX_ENTRIES': 100000}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -95,7 +139,11 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
 
@@ -140,5 +188,34 @@ USERNAME_PATTERN = r'^[\w.@+-]+\Z'
 MIN_AMOUNT = 1
 MAX_AMOUNT = 10000
 MIN_COOKING_TIME = 1
+MIN_SERVINGS = 1
+MAX_SERVINGS = 100
 MAX_COOKING_TIME = 240
 PAGE_LIMIT_PAGINATION_PAGE_SIZE = 6
+SHOPPING_LIST_CHUNK_SIZE = 500
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'russian')
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+RECIPE_MATCHER_TTL = int(os.getenv('RECIPE_MATCHER_TTL', 3600))
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 300))
+RECOMMENDATIONS_TOP_K = int(os.getenv('RECOMMENDATIONS_TOP_K', 20))
+RECOMMENDATIONS_LIMIT = 100
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 10000))
+FEED_BACKFILL_SIZE = 100
+BULK_RECIPES_LIMIT = 100
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+RESPONSE_CACHE_MAX_AGE = int(os.getenv('RESPONSE_CACHE_MAX_AGE', 60))
+IMAGE_MAX_SIDE = 5000
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', False) == 'True'
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', 8))
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANTS = {
+    'thumbnail': 160,
+    'card': 480,
+    'full': 1280,
+}
@@ -0,0 +1,38 @@
+"""Settings for workers that only serve /api/.
+
+    DJANGO_SETTINGS_MODULE=backend.settings_api gunicorn backend.wsgi
+
+Drops the admin, sessions, messages and the template engine, keeps only
+the middleware the API needs and renders JSON with orjson. The admin
+keeps running on workers with the default settings.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS
+    if app not in (
+        'django.contrib.admin',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+    )
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
@@ -5,9 +5,11 @@ from django.urls import include, path
 
 urlpatterns = [
     path('api/', include('api.urls')),
-    path('admin/', admin.site.urls),
 ]
 
+if 'django.contrib.admin' in settings.INSTALLED_APPS:
+    urlpatterns += [path('admin/', admin.site.urls)]
+
 
 if settings.DEBUG:
     urlpatterns += static(
@@ -4,11 +4,29 @@ from .models import (FavoriteRecipe, Follow, Ingredient,
                      IngredientAmountForRecipe, Recipe, RecipeShoppingCart,
                      Tag, User)
 
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Shown for reference only.
+
+    Shopping list totals are kept up to date by the API; an edit made
+    here would leave them stale.
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(User)
 admin.site.register(Tag)
 admin.site.register(Ingredient)
 admin.site.register(Recipe)
-admin.site.register(IngredientAmountForRecipe)
+admin.site.register(IngredientAmountForRecipe, ReadOnlyAdmin)
 admin.site.register(FavoriteRecipe)
-admin.site.register(RecipeShoppingCart)
+admin.site.register(RecipeShoppingCart, ReadOnlyAdmin)
 admin.site.register(Follow)
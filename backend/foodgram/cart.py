@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db.models import F, Sum
+
+from .models import (IngredientAmountForRecipe, RecipeShoppingCart,
+                     ShoppingListItem, User)
+
+
+def lock_users(user_ids):
+    # Every write to a user's totals goes through the user row, so two
+    # requests for the same cart cannot interleave their read-modify-write.
+    list(User.objects.select_for_update().filter(
+        pk__in=user_ids
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def apply_cart_changes(user_id, servings):
+    """Add servings ({recipe_id: delta}) of recipes to the user's totals.
+
+    Negative deltas remove recipes or scale them down; totals that drop
+    to zero are deleted.
+    """
+    deltas = defaultdict(int)
+    for recipe_id, ingredient_id, amount in (
+        IngredientAmountForRecipe.objects.filter(
+            recipe_id__in=servings
+        ).values_list('recipe_id', 'ingredient_id', 'amount')
+    ):
+        deltas[ingredient_id] += amount * servings[recipe_id]
+    if not any(deltas.values()):
+        return
+    lock_users((user_id,))
+    items = {
+        item.ingredient_id: item
+        for item in ShoppingListItem.objects.filter(
+            user_id=user_id, ingredient_id__in=deltas
+        )
+    }
+    changed, emptied, created = [], [], []
+    for ingredient_id, delta in deltas.items():
+        item = items.get(ingredient_id)
+        if item is None:
+            if delta > 0:
+                created.append(ShoppingListItem(
+                    user_id=user_id, ingredient_id=ingredient_id,
+                    amount=delta
+                ))
+        elif item.amount + delta > 0:
+            item.amount += delta
+            changed.append(item)
+        else:
+            emptied.append(item.id)
+    if emptied:
+        ShoppingListItem.objects.filter(id__in=emptied).delete()
+    if changed:
+        ShoppingListItem.objects.bulk_update(changed, ['amount'])
+    if created:
+        ShoppingListItem.objects.bulk_create(created)
+
+
+def refresh_shopping_lists(user_ids, ingredient_ids=None):
+    """Recompute totals of the given users from their carts.
+
+    Used when the recipes themselves change and for rebuilds; restricting
+    ingredient_ids keeps a recipe edit to the ingredients it touched.
+    """
+    carts = RecipeShoppingCart.objects.filter(user_id__in=user_ids)
+    items = ShoppingListItem.objects.filter(user_id__in=user_ids)
+    if ingredient_ids is not None:
+        carts = carts.filter(
+            recipe__recipe_amount__ingredient_id__in=ingredient_ids
+        )
+        items = items.filter(ingredient_id__in=ingredient_ids)
+    lock_users(user_ids)
+    items.delete()
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            )
+            for user_id, ingredient_id, amount in carts.values(
+                'user_id', 'recipe__recipe_amount__ingredient_id'
+            ).annotate(
+                amount=Sum(F('recipe__recipe_amount__amount') * F('servings'))
+            ).order_by().values_list(
+                'user_id', 'recipe__recipe_amount__ingredient_id', 'amount'
+            ).iterator()
+            if amount
+        ),
+        batch_size=1000
+    )
+
+
+def refresh_recipe_carts(recipe_id, ingredient_ids):
+    if ingredient_ids:
+        refresh_shopping_lists(
+            RecipeShoppingCart.objects.filter(
+                recipe_id=recipe_id
+            ).values('user_id'),
+            ingredient_ids
+        )
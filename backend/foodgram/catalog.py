@@ -0,0 +1,292 @@
+import csv
+import json
+import re
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+
+from django.db import connection, transaction
+
+from .models import Ingredient, Tag
+from .units import normalize
+
+FORMATS = ('csv', 'json', 'jsonl')
+READ_SIZE = 1 << 16
+ARRAY_SEPARATOR = re.compile(r'\s*,*\s*')
+TOKEN_BOUNDARIES = frozenset(' \t\n\r,:[]{}"')
+
+
+class CatalogError(Exception):
+    pass
+
+
+class Catalog:
+    """How rows of one model are keyed, cleaned and written.
+
+    key fields identify a row (the natural key backed by a unique
+    constraint); every other concrete field is overwritten when it
+    differs. prepare fills fields derived from the imported ones.
+    """
+
+    def __init__(self, model, key, fields, prepare=None):
+        self.model = model
+        self.key = key
+        self.fields = fields
+        self.prepare = prepare
+        self.key_of = itemgetter(*key) if len(key) > 1 else (
+            lambda values: (values[key[0]],)
+        )
+        self.max_lengths = {
+            name: model._meta.get_field(name).max_length
+            for name in key + fields
+        }
+        self.update_fields = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in key
+        ]
+
+    def build(self, row):
+        values = {}
+        for name, max_length in self.max_lengths.items():
+            value = row.get(name)
+            if not isinstance(value, str) or not value.strip():
+                raise CatalogError(f'no {name}')
+            value = ' '.join(value.split())
+            if len(value) > max_length:
+                raise CatalogError(f'{name} is longer than {max_length}')
+            values[name] = value
+        if self.prepare:
+            self.prepare(values)
+        return values
+
+
+def normalize_ingredient(values):
+    values['canonical_unit'], values['unit_factor'] = normalize(
+        values['name'], values['measurement_unit']
+    )
+
+
+CATALOGS = {
+    'ingredients': Catalog(
+        Ingredient, ('name', 'measurement_unit'), (),
+        prepare=normalize_ingredient
+    ),
+    'tags': Catalog(Tag, ('slug',), ('name', 'color')),
+}
+
+
+def detect_format(file, name):
+    """Return (format, file) guessed from the extension or the content."""
+    extension = name.rsplit('.', 1)[-1].lower()
+    if extension in FORMATS:
+        return extension, file
+    start = file.read(READ_SIZE)
+    first = start.lstrip()[:1]
+    file = ChainedFile(start, file)
+    if first == '[':
+        return 'json', file
+    if first == '{':
+        return 'jsonl', file
+    return 'csv', file
+
+
+class ChainedFile:
+    # Puts back what detect_format read from a stream that cannot seek.
+    def __init__(self, head, file):
+        self.head = head
+        self.file = file
+
+    def read(self, size=-1):
+        if self.head:
+            head, self.head = self.head, ''
+            return head
+        return self.file.read(size)
+
+    def __iter__(self):
+        line = ''
+        while True:
+            chunk = self.read(READ_SIZE)
+            if not chunk:
+                break
+            line += chunk
+            *lines, line = line.split('\n')
+            for complete in lines:
+                yield complete + '\n'
+        if line:
+            yield line
+
+
+def json_error(error, consumed, lines):
+    # error.pos is relative to the buffer; consumed characters and lines
+    # were dropped from its front.
+    line = lines + error.doc.count('\n', 0, error.pos) + 1
+    return CatalogError(
+        f'line {line}: {error.msg} (char {consumed + error.pos})'
+    )
+
+
+def cut_by_chunk(error):
+    # Only a value that runs into the end of the buffer can be completed
+    # by the next chunk: an open string, or a partial literal or number
+    # ("tru", "1.", "-") after which nothing else was read.
+    return error.msg.startswith('Unterminated string') or not (
+        TOKEN_BOUNDARIES.intersection(error.doc[error.pos:])
+    )
+
+
+def read_json_array(file):
+    """Yield the items of a top-level JSON array without loading it whole.
+
+    A syntax error is reported with its line and offset as soon as it is
+    read; only an item cut by the end of a chunk waits for the next one.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE)
+    position = len(buffer) - len(buffer.lstrip())
+    if not buffer.startswith('[', position):
+        raise CatalogError('JSON input must be an array of objects')
+    position += 1
+    consumed = lines = 0
+    while True:
+        position = ARRAY_SEPARATOR.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            if not cut_by_chunk(error):
+                raise json_error(error, consumed, lines)
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise json_error(error, consumed, lines)
+            consumed += position
+            lines += buffer.count('\n', 0, position)
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+def read_json_lines(file):
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise CatalogError(f'line {number}: {error}')
+
+
+def read_rows(file, file_format):
+    if file_format == 'csv':
+        return csv.DictReader(file)
+    if file_format == 'jsonl':
+        return read_json_lines(file)
+    return read_json_array(file)
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_rows(model, rows):
+    """Insert rows, skipping natural keys taken meanwhile; return the count."""
+    # A plain executemany: building and compiling a model instance per
+    # row is most of the cost of bulk_create on large imports. Catalog
+    # rows carry every column, so no defaults need filling in.
+    names = list(rows[0])
+    ops = connection.ops
+    columns = ', '.join(
+        ops.quote_name(model._meta.get_field(name).column) for name in names
+    )
+    placeholders = ', '.join(['%s'] * len(names))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{ops.quote_name(model._meta.db_table)} ({columns}) '
+            f'VALUES ({placeholders}) '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            [tuple(row[name] for name in names) for row in rows]
+        )
+        return cursor.rowcount
+
+
+def write_batch(catalog, rows, dry_run):
+    """Upsert one batch of deduplicated rows; return a Counter diff.
+
+    One query finds the existing rows by natural key, new rows go in one
+    insert and changed ones in one bulk_update. Existing rows are
+    read as tuples, since most of a re-run is rows that did not change.
+    Rows another import inserted between the read and the insert are
+    left as they are and counted as conflicts.
+    """
+    model = catalog.model
+    first_key = catalog.key[0]
+    fields = catalog.update_fields
+    key_length = len(catalog.key)
+    existing = {
+        values[1:key_length + 1]: (values[0], values[key_length + 1:])
+        for values in model.objects.filter(**{
+            f'{first_key}__in': {row[first_key] for row in rows}
+        }).values_list('id', *catalog.key, *fields)
+    }
+    created, changed, diff = [], [], Counter()
+    for row in rows:
+        current = existing.get(catalog.key_of(row))
+        if current is None:
+            created.append(row)
+        elif current[1] != tuple(row[name] for name in fields):
+            changed.append(model(id=current[0], **row))
+        else:
+            diff['unchanged'] += 1
+    diff['created'] = len(created)
+    diff['updated'] = len(changed)
+    if not dry_run:
+        with transaction.atomic():
+            if created:
+                diff['created'] = insert_rows(model, created)
+                diff['conflict'] = len(created) - diff['created']
+            if changed:
+                model.objects.bulk_update(changed, fields)
+    return diff
+
+
+def import_catalog(catalog, rows, batch_size=1000, dry_run=False,
+                   on_batch=None):
+    """Upsert rows into the catalog model and return a Counter diff.
+
+    Rows are read and written batch by batch, each batch in its own
+    transaction, so memory stays flat whatever the input size. Repeated
+    natural keys keep their first occurrence; rows that cannot be
+    imported are counted as invalid and passed to on_batch.
+    """
+    diff = Counter()
+    seen = set()
+    for number, batch in enumerate(batches(rows, batch_size), 1):
+        valid, errors = [], []
+        for row in batch:
+            try:
+                if not isinstance(row, dict):
+                    raise CatalogError('not an object')
+                values = catalog.build(row)
+            except CatalogError as error:
+                errors.append((row, error))
+                continue
+            key = catalog.key_of(values)
+            if key in seen:
+                diff['duplicate'] += 1
+                continue
+            seen.add(key)
+            valid.append(values)
+        diff['invalid'] += len(errors)
+        if valid:
+            diff.update(write_batch(catalog, valid, dry_run))
+        diff['rows'] += len(batch)
+        if on_batch:
+            on_batch(number, diff, errors)
+    return diff
@@ -0,0 +1,97 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import FavoriteRecipe, Follow, Recipe, RecipeShoppingCart, User
+
+# (model holding the counter, counter field, counted model, FK to the holder)
+COUNTERS = (
+    (Recipe, 'favorites_count', FavoriteRecipe, 'recipe'),
+    (Recipe, 'shopping_cart_count', RecipeShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'shopping_cart_count', RecipeShoppingCart, 'user'),
+    (User, 'followers_count', Follow, 'subscribed_to'),
+)
+
+
+def counters_for(counted_model):
+    return [
+        (model, field, foreign_key)
+        for model, field, counted, foreign_key in COUNTERS
+        if counted is counted_model
+    ]
+
+
+def change_counters(counted_model, objects, delta):
+    """Add delta per object to the counters of the objects' holders.
+
+    Counters are only ever changed by deltas, so concurrent writers add
+    up instead of overwriting each other; holders with the same change
+    share one UPDATE, e.g. the recipes of a bulk add.
+    """
+    for model, field, foreign_key in counters_for(counted_model):
+        holders = defaultdict(list)
+        for holder, number in Counter(
+            getattr(counted_object, f'{foreign_key}_id')
+            for counted_object in objects
+        ).items():
+            holders[number * delta].append(holder)
+        for change, pks in holders.items():
+            model.objects.filter(pk__in=pks).update(
+                **{field: F(field) + change}
+            )
+
+
+def actual_count(counted_model, foreign_key):
+    return Coalesce(
+        Subquery(
+            counted_model.objects.filter(
+                **{foreign_key: OuterRef('pk')}
+            ).order_by().values(foreign_key).annotate(
+                count=Count('pk')
+            ).values('count')
+        ),
+        Value(0)
+    )
+
+
+def delete_counted(queryset):
+    """Delete the rows of queryset with one DELETE, skipping the per-row
+    signals, decrement their counters and return the deleted rows.
+
+    The rows are locked first, so of two concurrent deletes of a row only
+    one gets it back and changes the counters.
+    """
+    model = queryset.model
+    if model._meta.related_objects:
+        # A single DELETE would skip the cascades the collector runs.
+        raise TypeError(
+            f'delete_counted() cannot delete {model.__name__} rows, '
+            f'other models refer to them.'
+        )
+    objects = list(queryset.select_for_update())
+    if not objects:
+        return objects
+    model.objects.filter(
+        pk__in=[counted_object.pk for counted_object in objects]
+    )._raw_delete(queryset.db)
+    change_counters(model, objects, -1)
+    return objects
+
+
+def rebuild_counters():
+    for model, field, counted_model, foreign_key in COUNTERS:
+        model.objects.update(
+            **{field: actual_count(counted_model, foreign_key)}
+        )
+
+
+def counter_mismatches():
+    for model, field, counted_model, foreign_key in COUNTERS:
+        for pk, stored, actual in model.objects.annotate(
+            actual=actual_count(counted_model, foreign_key)
+        ).exclude(
+            **{field: F('actual')}
+        ).values_list('pk', field, 'actual'):
+            yield model, field, pk, stored, actual
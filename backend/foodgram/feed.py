@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db.models import Q
+
+from .models import FeedEntry, Follow, Recipe, User
+
+BATCH_SIZE = 1000
+
+
+def fan_out(recipe):
+    """Put a new recipe into the feed of every follower of its author.
+
+    Recipes of authors above FEED_FANOUT_LIMIT followers are marked with
+    fanned_out=False instead and merged into feeds at read time
+    (feed_keys). The decision is stored per recipe, so the recipe stays
+    in the feeds whichever way the author's follower count moves later.
+    """
+    followers_count = User.objects.filter(
+        pk=recipe.author_id
+    ).values_list('followers_count', flat=True).get()
+    if followers_count > settings.FEED_FANOUT_LIMIT:
+        recipe.fanned_out = False
+        Recipe.objects.filter(pk=recipe.pk).update(fanned_out=False)
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=subscriber_id,
+                recipe_id=recipe.id,
+                created_at=recipe.created_at
+            )
+            for subscriber_id in Follow.objects.filter(
+                subscribed_to_id=recipe.author_id
+            ).values_list('subscriber_id', flat=True).iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(follows):
+    """Copy the latest FEED_BACKFILL_SIZE recipes of each followed author."""
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=follow.subscriber_id,
+                recipe_id=recipe_id,
+                created_at=created_at
+            )
+            for follow in follows
+            for recipe_id, created_at in Recipe.objects.filter(
+                author_id=follow.subscribed_to_id,
+                fanned_out=True
+            ).values_list(
+                'id', 'created_at'
+            )[:settings.FEED_BACKFILL_SIZE]
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def trim(follow):
+    FeedEntry.objects.filter(
+        user_id=follow.subscriber_id,
+        recipe__author_id=follow.subscribed_to_id
+    ).delete()
+
+
+def before(position, id_field='id'):
+    if position is None:
+        return Q()
+    created_at, key = position
+    return Q(created_at__lt=created_at) | Q(
+        created_at=created_at, **{f'{id_field}__lt': key}
+    )
+
+
+def feed_keys(user, position, limit):
+    """Return up to limit (created_at, recipe_id) keys after position.
+
+    Materialized entries come from one range scan of the user's feed
+    index; recipes that were not fanned out are read from the recipe
+    table with the same keyset and merged in.
+    """
+    entries = FeedEntry.objects.filter(
+        before(position, id_field='recipe_id'), user=user
+    ).order_by(
+        '-created_at', '-recipe_id'
+    ).values_list('created_at', 'recipe_id')[:limit]
+    pulled = Recipe.objects.filter(
+        before(position),
+        fanned_out=False,
+        author__in=User.objects.filter(subscribed_to__subscriber=user)
+    ).order_by(
+        '-created_at', '-id'
+    ).values_list('created_at', 'id')[:limit]
+    return sorted(set(entries) | set(pulled), reverse=True)[:limit]
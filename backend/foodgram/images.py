@@ -0,0 +1,112 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANT_NAME = '{directory}/variants/{stem}_{size}.{extension}'
+FORMATS = (
+    ('webp', 'WEBP'),
+    ('jpeg', 'JPEG'),
+)
+
+executor = None
+
+
+def build_variants(image_name):
+    directory, filename = os.path.split(image_name)
+    stem = os.path.splitext(filename)[0]
+    variants = {}
+    with default_storage.open(image_name) as file, Image.open(file) as image:
+        image.load()
+        for size, side in settings.IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail((side, side))
+            variants[size] = {}
+            for extension, pillow_format in FORMATS:
+                if pillow_format == 'JPEG' and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')
+                buffer = BytesIO()
+                resized.save(
+                    buffer, pillow_format,
+                    quality=settings.IMAGE_VARIANT_QUALITY
+                )
+                variants[size][extension] = default_storage.save(
+                    VARIANT_NAME.format(
+                        directory=directory, stem=stem, size=size,
+                        extension=extension
+                    ),
+                    ContentFile(buffer.getvalue())
+                )
+    return variants
+
+
+def delete_variants(variants):
+    for formats in variants.values():
+        for name in formats.values():
+            default_storage.delete(name)
+
+
+def discard_variants(variants):
+    """Delete the files of replaced variants once the transaction commits.
+    """
+    if variants:
+        transaction.on_commit(lambda: delete_variants(variants))
+
+
+def process_recipe_image(recipe_id, image_name):
+    variants = build_variants(image_name)
+    with transaction.atomic():
+        # The image may have been replaced while this one was processed.
+        replaced = Recipe.objects.select_for_update().filter(
+            pk=recipe_id, image=image_name
+        ).values_list('image_variants', flat=True).first()
+        if replaced is None:
+            replaced = variants
+        else:
+            Recipe.objects.filter(pk=recipe_id).update(
+                image_variants=variants
+            )
+        # process_images --all builds new files under new names.
+        discard_variants(replaced)
+
+
+def process_in_worker(recipe_id, image_name):
+    close_old_connections()
+    try:
+        process_recipe_image(recipe_id, image_name)
+    except Exception:
+        logger.exception('Could not build variants for recipe %s', recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_image_variants(recipe):
+    """Build the recipe image variants once the transaction commits.
+
+    Runs in a thread pool of IMAGE_WORKERS threads, or inline when it is
+    0. Recipes whose variants were lost, e.g. on a restart, are picked up
+    again by the process_images command.
+    """
+    global executor
+    arguments = (recipe.pk, recipe.image.name)
+    if not settings.IMAGE_WORKERS:
+        transaction.on_commit(lambda: process_recipe_image(*arguments))
+        return
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            thread_name_prefix='recipe-images'
+        )
+    transaction.on_commit(
+        lambda: executor.submit(process_in_worker, *arguments)
+    )
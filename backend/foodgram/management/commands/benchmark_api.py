@@ -0,0 +1,464 @@
+import base64
+import io
+import json
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.urls import router_v1
+from foodgram.cart import refresh_shopping_lists
+from foodgram.counters import rebuild_counters
+from foodgram.feed import backfill
+from foodgram.models import (FavoriteRecipe, Follow, Ingredient,
+                             IngredientAmountForRecipe, Recipe,
+                             RecipeShoppingCart, Tag, User)
+from foodgram.recommendations import build_recommendations
+from foodgram.search import rebuild_search_index
+
+BUDGET_PATH = settings.BASE_DIR / 'data' / 'benchmark_budget.json'
+BENCH_PASSWORD = 'bench-password-123'
+BULK_SIZE = 20
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    },
+    'state': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-state',
+    },
+}
+SKIPPED_ROUTES = (
+    'users-activation',
+    'users-resend-activation',
+    'users-reset-password',
+    'users-reset-password-confirm',
+    'users-reset-username',
+    'users-reset-username-confirm',
+    'users-set-username',
+)
+BAD_STATUS = '{endpoint}: status {status}'
+BUDGET_EXCEEDED = '{endpoint}: {queries} queries, budget {budget}'
+NO_BUDGET = '{endpoint}: no stored budget'
+UNCOVERED_ROUTES = 'Routes without a benchmark scenario: {routes}'
+
+
+def png_base64():
+    buffer = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class Seed:
+    """Synthetic data set, created inside the benchmark transaction."""
+
+    def __init__(self, options):
+        self.random = random.Random(options['seed'])
+        password = make_password(BENCH_PASSWORD)
+        User.objects.bulk_create(
+            User(
+                email=f'bench_{number}@bench.local',
+                username=f'bench_{number}',
+                first_name='Bench',
+                last_name=str(number),
+                password=password,
+            )
+            for number in range(max(options['users'], 2))
+        )
+        self.users = list(User.objects.filter(
+            email__endswith='@bench.local'
+        ).order_by('id'))
+        self.user = self.users[0]
+        Tag.objects.bulk_create(
+            Tag(name=f'bench {number}', color='#000000',
+                slug=f'bench-{number}')
+            for number in range(3)
+        )
+        self.tags = list(Tag.objects.filter(slug__startswith='bench-'))
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'bench ingredient {number}',
+                       measurement_unit='г')
+            for number in range(max(options['ingredients_per_recipe'], 10))
+        )
+        self.ingredients = list(Ingredient.objects.filter(
+            name__startswith='bench ingredient'
+        ).order_by('id'))
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f'bench recipe {author.id}-{number}',
+                image='foodgram/images/bench.png',
+                text='bench',
+                cooking_time=10,
+            )
+            for author in self.users
+            for number in range(options['recipes_per_user'])
+        )
+        self.recipes = list(Recipe.objects.filter(
+            author__in=self.users
+        ).order_by('id'))
+        IngredientAmountForRecipe.objects.bulk_create(
+            IngredientAmountForRecipe(
+                recipe=recipe, ingredient=ingredient, amount=10
+            )
+            for recipe in self.recipes
+            for ingredient in self.random.sample(
+                self.ingredients, options['ingredients_per_recipe']
+            )
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=self.random.choice(
+                self.tags
+            ))
+            for recipe in self.recipes
+        )
+        self.follows = {}
+        Follow.objects.bulk_create(
+            Follow(subscriber=user, subscribed_to=author)
+            for user in self.users
+            for author in self.sample_authors(user, options['follows'])
+        )
+        for SectionModel, option in ((FavoriteRecipe, 'favorites'),
+                                     (RecipeShoppingCart, 'carts')):
+            SectionModel.objects.bulk_create(
+                SectionModel(user=user, recipe=recipe)
+                for user in self.users
+                for recipe in self.random.sample(
+                    self.recipes, min(options[option], len(self.recipes))
+                )
+            )
+        rebuild_counters()
+        refresh_shopping_lists([user.id for user in self.users])
+        rebuild_search_index()
+        build_recommendations(full=True)
+        backfill(Follow.objects.filter(subscriber__in=self.users))
+        self.token = Token.objects.create(user=self.user).key
+        self.free_recipes = list(Recipe.objects.filter(
+            author__in=self.users[1:]
+        ).exclude(
+            favorited__user=self.user
+        ).exclude(
+            shopping_carted__user=self.user
+        ).values_list('id', flat=True))
+        self.free_authors = [
+            author.id for author in self.users[1:]
+            if author.id not in self.follows[self.user.id]
+        ]
+
+    def sample_authors(self, user, count):
+        authors = [author for author in self.users if author != user]
+        sample = self.random.sample(authors, min(count, len(authors)))
+        self.follows[user.id] = {author.id for author in sample}
+        return sample
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic data set, run every API route and report query '
+        'counts, p50/p95 latency and allocations. All seeded data is '
+        'rolled back when the run finishes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=30)
+        parser.add_argument('--recipes-per-user', type=int, default=5)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--follows', type=int, default=10)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--budget', default=BUDGET_PATH)
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail when an endpoint exceeds its stored query budget.'
+        )
+        parser.add_argument(
+            '--write-budget', action='store_true',
+            help='Store the measured query counts as the new budget.'
+        )
+        parser.add_argument(
+            '--json', dest='json_path',
+            help='Also write the raw results to this file.'
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root,
+                                      CACHES=BENCHMARK_CACHES), \
+                    transaction.atomic():
+                results = self.run_benchmark(options)
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+        self.report(results)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as file:
+                json.dump(results, file, indent=2, ensure_ascii=False)
+        if options['write_budget']:
+            with open(options['budget'], 'w') as file:
+                json.dump(
+                    {result['endpoint']: result['queries']
+                     for result in results},
+                    file, indent=2, sort_keys=True
+                )
+                file.write('\n')
+        if options['check']:
+            self.check_budget(results, options['budget'])
+
+    def run_benchmark(self, options):
+        seed = Seed(options)
+        iterations = options['repeat'] + 1
+        if min(len(seed.free_recipes), len(seed.free_authors)) < iterations:
+            raise CommandError(
+                'Not enough seeded data for --repeat, '
+                'lower --follows/--favorites/--carts or add --users.'
+            )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {seed.token}')
+        scenarios = self.scenarios(seed, client, iterations)
+        uncovered = sorted(
+            {url.name for url in router_v1.urls}
+            - {scenario[1] for scenario in scenarios}
+            - set(SKIPPED_ROUTES)
+        )
+        if uncovered:
+            self.stderr.write(UNCOVERED_ROUTES.format(
+                routes=', '.join(uncovered)
+            ))
+        return [
+            self.measure(seed, iterations, *scenario)
+            for scenario in scenarios
+        ]
+
+    def scenarios(self, seed, client, iterations):
+        anonymous = self.anonymous = APIClient()
+        recipe = seed.recipes[-1].id
+        author = seed.users[-1].id
+        created = []
+        image = png_base64()
+
+        def recipe_data(number):
+            return {
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': 5}
+                    for ingredient in seed.ingredients[:8]
+                ],
+                'tags': [seed.tags[0].id],
+                'image': image,
+                'name': f'bench created {number}',
+                'text': 'bench',
+                'cooking_time': 5,
+            }
+
+        def create(number):
+            return recipe_data(number)
+
+        def bulk_recipes(number):
+            return {'recipes': seed.free_recipes[:BULK_SIZE]}
+
+        def login_client(number):
+            return anonymous
+
+        return [
+            ('GET', 'recipes-list', lambda n: {}, client, {'limit': 50}),
+            ('GET', 'recipes-list', lambda n: {}, anonymous, {'limit': 50}),
+            ('GET', 'recipes-list', lambda n: {}, client,
+             {'limit': 50, 'is_favorited': 1}),
+            ('GET', 'recipes-list', lambda n: {}, client,
+             {'limit': 50, 'cursor': ''}),
+            ('GET', 'recipes-list', lambda n: {}, client,
+             {'limit': 50, 'search': 'bench recipe'}),
+            ('GET', 'recipes-recommended', lambda n: {}, client,
+             {'limit': 50}),
+            ('GET', 'recipes-feed', lambda n: {}, client, {'limit': 50}),
+            ('GET', 'recipes-cookable', lambda n: {}, client,
+             {'limit': 50, 'ingredients': [
+                 ingredient.id for ingredient in seed.ingredients[:10]
+             ]}),
+            ('GET', 'recipes-detail', lambda n: {'id': recipe}, client, None),
+            ('GET', 'recipes-download-shopping-cart', lambda n: {}, client,
+             None),
+            ('GET', 'recipes-download-shopping-cart', lambda n: {}, client,
+             {'file_format': 'csv'}),
+            ('GET', 'recipes-download-shopping-cart', lambda n: {}, client,
+             {'file_format': 'pdf'}),
+            ('POST', 'recipes-favorite',
+             lambda n: {'id': seed.free_recipes[n]}, client, None),
+            ('DELETE', 'recipes-favorite',
+             lambda n: {'id': seed.free_recipes[n]}, client, None),
+            ('POST', 'recipes-shopping-cart',
+             lambda n: {'id': seed.free_recipes[n]}, client, None),
+            ('PATCH', 'recipes-shopping-cart',
+             lambda n: {'id': seed.free_recipes[n]}, client, {'servings': 3}),
+            ('DELETE', 'recipes-shopping-cart',
+             lambda n: {'id': seed.free_recipes[n]}, client, None),
+            ('POST', 'recipes-favorite-bulk', lambda n: {}, client,
+             bulk_recipes),
+            ('DELETE', 'recipes-favorite-bulk', lambda n: {}, client,
+             bulk_recipes),
+            ('POST', 'recipes-shopping-cart-bulk', lambda n: {}, client,
+             bulk_recipes),
+            ('DELETE', 'recipes-shopping-cart-bulk', lambda n: {}, client,
+             bulk_recipes),
+            ('POST', 'recipes-list', lambda n: {}, client, create, created),
+            ('PATCH', 'recipes-detail',
+             lambda n: {'id': created[n]}, client, recipe_data),
+            ('DELETE', 'recipes-detail',
+             lambda n: {'id': created[n]}, client, None),
+            ('GET', 'tags-list', lambda n: {}, anonymous, None),
+            ('GET', 'tags-detail', lambda n: {'pk': seed.tags[0].id},
+             anonymous, None),
+            ('GET', 'ingredients-list', lambda n: {}, anonymous, None),
+            ('GET', 'ingredients-list', lambda n: {}, anonymous,
+             {'name': 'bench'}),
+            ('GET', 'ingredients-detail',
+             lambda n: {'pk': seed.ingredients[0].id}, anonymous, None),
+            ('GET', 'users-list', lambda n: {}, client, {'limit': 50}),
+            ('GET', 'users-detail', lambda n: {'id': author}, client, None),
+            ('GET', 'users-me', lambda n: {}, client, None),
+            ('GET', 'users-subscriptions', lambda n: {}, client,
+             {'limit': 50, 'recipes_limit': 3}),
+            ('GET', 'users-subscriptions', lambda n: {}, client,
+             {'limit': 50, 'recipes_limit': 3, 'cursor': ''}),
+            ('POST', 'users-subscribe',
+             lambda n: {'id': seed.free_authors[n]}, client, None),
+            ('DELETE', 'users-subscribe',
+             lambda n: {'id': seed.free_authors[n]}, client, None),
+            ('POST', 'users-list', lambda n: {}, anonymous, lambda n: {
+                'email': f'bench_new_{n}@bench.local',
+                'username': f'bench_new_{n}',
+                'first_name': 'Bench',
+                'last_name': 'New',
+                'password': BENCH_PASSWORD,
+            }),
+            ('POST', 'users-set-password', lambda n: {}, client, {
+                'current_password': BENCH_PASSWORD,
+                'new_password': BENCH_PASSWORD,
+            }),
+            ('POST', 'login', lambda n: {}, anonymous, {
+                'email': seed.users[1].email,
+                'password': BENCH_PASSWORD,
+            }),
+            ('POST', 'logout', lambda n: {}, login_client, None),
+        ]
+
+    def measure(self, seed, iterations, method, url_name, url_kwargs,
+                request_client, data, created=None):
+        endpoint = f'{method} {url_name}'
+        if isinstance(data, dict) and method == 'GET':
+            # Lists hold seeded ids, which differ between databases, so
+            # only their length goes into the budget key.
+            endpoint += '?' + '&'.join(
+                f'{key}=[{len(value)} ids]' if isinstance(value, list)
+                else f'{key}={value}'
+                for key, value in data.items()
+            )
+        if request_client is self.anonymous:
+            endpoint += ' (anonymous)'
+        timings = []
+        queries = allocated = status = None
+        for number in range(iterations):
+            client = request_client
+            if callable(client):
+                client = self.logged_in_client(seed)
+            payload = data(number) if callable(data) else data
+            url = reverse(url_name, kwargs=url_kwargs(number) or None)
+            request = getattr(client, method.lower())
+            if number == 0:
+                tracemalloc.start()
+                with CaptureQueriesContext(connection) as context:
+                    response = self.consume(
+                        request(url, payload, format='json')
+                    )
+                allocated = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                queries = len(context)
+            else:
+                started = time.perf_counter()
+                response = self.consume(
+                    request(url, payload, format='json')
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+            if status is None or 200 <= status < 300:
+                # The first failure is reported, not the last status.
+                status = response.status_code
+            if created is not None:
+                created.append(response.data['id'])
+        if len(timings) > 1:
+            percentiles = statistics.quantiles(timings, n=20)
+            p50, p95 = statistics.median(timings), percentiles[-1]
+        else:
+            p50 = p95 = timings[0] if timings else 0
+        return {
+            'endpoint': endpoint,
+            'status': status,
+            'queries': queries,
+            'p50_ms': round(p50, 2),
+            'p95_ms': round(p95, 2),
+            'allocated_kib': round(allocated / 1024, 1),
+        }
+
+    def consume(self, response):
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def logged_in_client(self, seed):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=seed.users[1])
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def report(self, results):
+        width = max(len(result['endpoint']) for result in results)
+        self.stdout.write(
+            f'{"endpoint":<{width}} status queries   p50 ms   p95 ms '
+            f' alloc KiB'
+        )
+        for result in results:
+            self.stdout.write(
+                f'{result["endpoint"]:<{width}} {result["status"]:>6} '
+                f'{result["queries"]:>7} {result["p50_ms"]:>8} '
+                f'{result["p95_ms"]:>8} {result["allocated_kib"]:>10}'
+            )
+
+    def check_budget(self, results, path):
+        with open(path) as file:
+            budget = json.load(file)
+        errors = []
+        for result in results:
+            if not 200 <= result['status'] < 300:
+                # A failing endpoint usually runs fewer queries, so the
+                # budget alone would let it through.
+                errors.append(BAD_STATUS.format(**result))
+            elif result['endpoint'] not in budget:
+                errors.append(NO_BUDGET.format(endpoint=result['endpoint']))
+            elif result['queries'] > budget[result['endpoint']]:
+                errors.append(BUDGET_EXCEEDED.format(
+                    endpoint=result['endpoint'],
+                    queries=result['queries'],
+                    budget=budget[result['endpoint']],
+                ))
+        if errors:
+            raise CommandError('\n'.join(errors))
+        self.stdout.write(self.style.SUCCESS('Query budget respected'))
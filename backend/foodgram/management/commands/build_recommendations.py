@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute similar recipes from favorites and shopping carts. '
+        'Only recipes touched since the previous run are updated unless '
+        '--full is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute every recipe, also picking up removed favorites.'
+        )
+        parser.add_argument(
+            '--top-k', type=int,
+            help='Neighbours to keep per recipe (RECOMMENDATIONS_TOP_K).'
+        )
+
+    def handle(self, *args, **options):
+        recipes, rows = build_recommendations(
+            full=options['full'], top_k=options['top_k']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed {recipes} recipes, stored {rows} neighbours'
+        ))
@@ -0,0 +1,84 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import bump_version
+from foodgram.catalog import (CATALOGS, FORMATS, CatalogError, detect_format,
+                              import_catalog, read_rows)
+
+
+class Command(BaseCommand):
+    help = (
+        'Create or update ingredients or tags from a CSV, JSON or JSONL '
+        'file (or stdin). Rows are matched by natural key, so the import '
+        'can be re-run safely.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('catalog', choices=sorted(CATALOGS))
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='File to read, "-" for stdin (default).'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Input format; guessed from the extension or the content.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per query and per transaction.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report what would change without writing anything.'
+        )
+
+    def report_batch(self, number, diff, errors):
+        if self.verbosity >= 2:
+            for row, error in errors:
+                self.stderr.write(f'Skipped {row!r}: {error}')
+        if self.verbosity >= 1:
+            self.stderr.write(
+                f'Batch {number}: {diff["rows"]} rows read', ending='\r'
+            )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        catalog = CATALOGS[options['catalog']]
+        path = options['path']
+        source = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        try:
+            file_format, file = (
+                (options['format'], source) if options['format']
+                else detect_format(source, path)
+            )
+            diff = import_catalog(
+                catalog, read_rows(file, file_format),
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+                on_batch=self.report_batch
+            )
+        except CatalogError as error:
+            raise CommandError(error)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        if self.verbosity >= 1:
+            self.stderr.write('')
+        if not options['dry_run'] and (diff['created'] or diff['updated']):
+            # Bulk writes skip the save signals that expire cached
+            # responses and the ingredient index.
+            bump_version(catalog.model)
+        self.stdout.write(self.style.SUCCESS(
+            ('Would import' if options['dry_run'] else 'Imported')
+            + f' {diff["rows"]} rows: {diff["created"]} created, '
+            f'{diff["updated"]} updated, {diff["unchanged"]} unchanged, '
+            f'{diff["duplicate"]} duplicates, {diff["invalid"]} invalid'
+            + (
+                f', {diff["conflict"]} inserted concurrently and skipped'
+                if diff['conflict'] else ''
+            )
+        ))
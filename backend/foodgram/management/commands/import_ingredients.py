@@ -1,20 +1,15 @@
-import csv
-
+from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
-from foodgram.models import Ingredient
-
-PATH_CSV = 'data/ingredients.csv'
+PATH_CSV = settings.BASE_DIR / 'data' / 'ingredients.csv'
 
 
 class Command(BaseCommand):
     help = 'Import data from CSV file into the database'
 
     def handle(self, *args, **kwargs):
-        objects_to_create = []
-        with open(PATH_CSV, 'r') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                objects_to_create.append(Ingredient(**row))
-        Ingredient.objects.bulk_create(objects_to_create, batch_size=500)
-        self.stdout.write(self.style.SUCCESS('pobeda with ingredients'))
+        call_command(
+            'import_catalog', 'ingredients', str(PATH_CSV),
+            verbosity=kwargs['verbosity']
+        )
@@ -0,0 +1,140 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+from itertools import cycle
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/recipes/?limit=50',
+    '/api/recipes/feed/?limit=50',
+    '/api/users/subscriptions/?limit=50&recipes_limit=3',
+    '/api/tags/',
+    '/api/ingredients/',
+)
+REPORT_LINE = (
+    '{path}: {requests} requests, {errors} errors, '
+    'p50 {p50_ms} ms, p95 {p95_ms} ms, p99 {p99_ms} ms'
+)
+TOTAL_LINE = '{requests} requests in {seconds} s: {rps} rps, {errors} errors'
+
+
+def percentiles(timings):
+    if len(timings) < 2:
+        value = round(timings[0], 2) if timings else 0
+        return value, value, value
+    cuts = statistics.quantiles(timings, n=100)
+    return (
+        round(statistics.median(timings), 2),
+        round(cuts[94], 2),
+        round(cuts[98], 2),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Send GET requests to a running server from --concurrency '
+        'keep-alive connections for --duration seconds and report '
+        'throughput and p50/p95/p99 latency per path. Compare deployments '
+        'by pointing it at each of them in turn with the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Server root, e.g. http://host:8000')
+        parser.add_argument(
+            'paths', nargs='*', default=DEFAULT_PATHS,
+            help='Paths to request in turn.'
+        )
+        parser.add_argument('--token', help='Authentication token.')
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--warmup', type=float, default=1)
+        parser.add_argument(
+            '--json', dest='json_path',
+            help='Also write the results to this file.'
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise CommandError(f'Not an http(s) URL: {options["url"]}')
+        headers = {'Accept': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        timings = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        started = time.monotonic()
+        measure_from = started + options['warmup']
+        stop_at = measure_from + options['duration']
+
+        def client(offset):
+            connection_class = (
+                http.client.HTTPSConnection if url.scheme == 'https'
+                else http.client.HTTPConnection
+            )
+            connection = connection_class(url.hostname, url.port, timeout=30)
+            paths = cycle(
+                options['paths'][offset % len(options['paths']):]
+                + options['paths'][:offset % len(options['paths'])]
+            )
+            for path in paths:
+                request_started = time.monotonic()
+                if request_started >= stop_at:
+                    break
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    failed = response.status >= 400
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    failed = True
+                elapsed = (time.monotonic() - request_started) * 1000
+                if request_started < measure_from:
+                    continue
+                with lock:
+                    if failed:
+                        errors[path] += 1
+                    else:
+                        timings[path].append(elapsed)
+            connection.close()
+
+        threads = [
+            threading.Thread(target=client, args=(number,), daemon=True)
+            for number in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results = []
+        for path in options['paths']:
+            p50, p95, p99 = percentiles(timings[path])
+            results.append({
+                'path': path,
+                'requests': len(timings[path]),
+                'errors': errors[path],
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+            })
+            self.stdout.write(REPORT_LINE.format(**results[-1]))
+        total = sum(result['requests'] for result in results)
+        summary = {
+            'requests': total,
+            'errors': sum(errors.values()),
+            'seconds': options['duration'],
+            'rps': round(total / options['duration'], 1),
+        }
+        self.stdout.write(TOTAL_LINE.format(**summary))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as file:
+                json.dump(
+                    {'summary': summary, 'paths': results},
+                    file, indent=2, ensure_ascii=False
+                )
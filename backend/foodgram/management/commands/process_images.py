@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.images import process_recipe_image
+from foodgram.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Build missing thumbnail/card/full variants of recipe images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Rebuild variants for every recipe, not only missing ones.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        processed = failed = 0
+        for recipe_id, image_name in recipes.values_list(
+                'id', 'image').iterator():
+            try:
+                process_recipe_image(recipe_id, image_name)
+                processed += 1
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Recipe {recipe_id}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} recipe images, {failed} failed'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from foodgram.counters import counter_mismatches, rebuild_counters
+
+MISMATCH = '{model} {pk}: {field} = {stored}, actual {actual}'
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the denormalized favorite/cart/recipe counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report mismatches and fail if there are any.'
+        )
+
+    def handle(self, *args, **options):
+        mismatches = list(counter_mismatches())
+        for model, field, pk, stored, actual in mismatches:
+            self.stdout.write(MISMATCH.format(
+                model=model.__name__, pk=pk, field=field,
+                stored=stored, actual=actual
+            ))
+        if options['check']:
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} counters are stale')
+            self.stdout.write(self.style.SUCCESS('All counters are correct'))
+            return
+        with transaction.atomic():
+            rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Counters rebuilt, {len(mismatches)} fixed'
+        ))
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+INDEX_NAME = 'ingredient_name_upper_idx'
+
+
+def create_index(apps, schema_editor):
+    # Covers the name__istartswith fallback, which Django compiles to
+    # UPPER(name) LIKE UPPER(%s). Postgres needs a pattern opclass for
+    # LIKE to use the index under a non-C collation.
+    opclass = (
+        ' text_pattern_ops'
+        if schema_editor.connection.vendor == 'postgresql' else ''
+    )
+    schema_editor.execute(
+        f'CREATE INDEX {INDEX_NAME} ON foodgram_ingredient '
+        f'(UPPER(name){opclass})'
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 01:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('Recipe', 'favorites_count', 'FavoriteRecipe', 'recipe'),
+    ('Recipe', 'shopping_cart_count', 'RecipeShoppingCart', 'recipe'),
+    ('User', 'recipes_count', 'Recipe', 'author'),
+    ('User', 'shopping_cart_count', 'RecipeShoppingCart', 'user'),
+    ('User', 'followers_count', 'Follow', 'subscribed_to'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for model, field, counted_model, foreign_key in COUNTERS:
+        counted = apps.get_model('foodgram', counted_model).objects.filter(
+            **{foreign_key: OuterRef('pk')}
+        ).order_by().values(foreign_key).annotate(
+            count=Count('pk')
+        ).values('count')
+        apps.get_model('foodgram', model).objects.update(
+            **{field: Coalesce(Subquery(counted), Value(0))}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0003_recipe_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='shopping_cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Рецептов в списке покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:04
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+INDEX_NAME = 'recipe_search_vector_idx'
+FTS_TABLE = 'foodgram_recipe_fts'
+
+
+def create_search_index(apps, schema_editor):
+    # Postgres keeps a weighted tsvector next to the row behind a GIN
+    # index; SQLite has no tsvector, so local runs use an FTS5 table
+    # keyed by the recipe id instead.
+    if schema_editor.connection.vendor == 'postgresql':
+        apps.get_model('foodgram', 'Recipe').objects.update(
+            search_vector=(
+                SearchVector(
+                    'name', weight='A', config=settings.SEARCH_CONFIG
+                )
+                + SearchVector(
+                    'text', weight='B', config=settings.SEARCH_CONFIG
+                )
+            )
+        )
+        schema_editor.execute(
+            f'CREATE INDEX {INDEX_NAME} ON foodgram_recipe '
+            'USING gin (search_vector)'
+        )
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(name, text)'
+    )
+    schema_editor.execute(
+        f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+        'SELECT id, name, text FROM foodgram_recipe'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX {INDEX_NAME}')
+    else:
+        schema_editor.execute(f'DROP TABLE {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0005_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
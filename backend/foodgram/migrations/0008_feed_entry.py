@@ -0,0 +1,58 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BACKFILL_SIZE = 100
+
+
+def fill_feeds(apps, schema_editor):
+    FeedEntry = apps.get_model('foodgram', 'FeedEntry')
+    Recipe = apps.get_model('foodgram', 'Recipe')
+    for follow in apps.get_model('foodgram', 'Follow').objects.iterator():
+        FeedEntry.objects.bulk_create(
+            FeedEntry(
+                user_id=follow.subscriber_id,
+                recipe_id=recipe_id,
+                created_at=created_at
+            )
+            for recipe_id, created_at in Recipe.objects.filter(
+                author_id=follow.subscribed_to_id
+            ).order_by('-created_at', '-id').values_list(
+                'id', 'created_at'
+            )[:BACKFILL_SIZE]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0007_recipe_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(verbose_name='Дата публикации рецепта')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='foodgram.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+                'default_related_name': 'feed_entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-created_at', '-recipe'], name='feed_user_created_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
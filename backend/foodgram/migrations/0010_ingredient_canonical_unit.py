@@ -0,0 +1,80 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+# Frozen copy of foodgram.units as of this migration: later edits of the
+# registry must not change what this migration writes.
+UNITS = {
+    'г': ('г', 1),
+    'гр': ('г', 1),
+    'кг': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'ч. л.': ('мл', 5),
+    'десертная ложка': ('мл', 10),
+    'ст. л.': ('мл', 15),
+    'стакан': ('мл', 250),
+}
+DENSITIES = {
+    'вода': 1.0,
+    'молоко': 1.03,
+    'кефир': 1.03,
+    'сливки': 1.0,
+    'сметана': 1.0,
+    'мед': 1.4,
+    'мёд': 1.4,
+    'мука': 0.53,
+    'сахар': 0.85,
+    'сахарная пудра': 0.6,
+    'соль': 1.2,
+    'крахмал': 0.65,
+    'манная крупа': 0.65,
+    'рис': 0.8,
+    'растительное масло': 0.92,
+    'подсолнечное масло': 0.92,
+    'оливковое масло': 0.92,
+    'уксус': 1.0,
+}
+
+
+def normalize(name, measurement_unit):
+    unit = ' '.join(measurement_unit.split()).lower()
+    canonical_unit, factor = UNITS.get(unit, (measurement_unit, 1))
+    density = DENSITIES.get(' '.join(name.split()).lower())
+    if canonical_unit == 'мл' and density is not None:
+        return 'г', factor * density
+    return canonical_unit, factor
+
+
+def fill_canonical_units(apps, schema_editor):
+    Ingredient = apps.get_model('foodgram', 'Ingredient')
+    ingredients = list(Ingredient.objects.only('name', 'measurement_unit'))
+    for ingredient in ingredients:
+        ingredient.canonical_unit, ingredient.unit_factor = normalize(
+            ingredient.name, ingredient.measurement_unit
+        )
+    Ingredient.objects.bulk_update(
+        ingredients, ['canonical_unit', 'unit_factor'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0009_shopping_list'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='canonical_unit',
+            field=models.CharField(default='', editable=False, max_length=25, verbose_name='Единица для подсчёта'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='unit_factor',
+            field=models.FloatField(default=1, editable=False, verbose_name='Множитель для подсчёта'),
+        ),
+        migrations.RunPython(fill_canonical_units, migrations.RunPython.noop),
+    ]
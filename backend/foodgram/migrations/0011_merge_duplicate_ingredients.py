@@ -0,0 +1,59 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:52
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_rows(model, field, duplicate_id, kept_id):
+    # Re-point rows of a duplicate ingredient, adding amounts where the
+    # same recipe (or user) already has the kept one.
+    kept = {
+        getattr(row, field): row
+        for row in model.objects.filter(ingredient_id=kept_id)
+    }
+    for row in model.objects.filter(ingredient_id=duplicate_id):
+        other = kept.get(getattr(row, field))
+        if other is None:
+            row.ingredient_id = kept_id
+            row.save(update_fields=['ingredient'])
+        else:
+            other.amount += row.amount
+            other.save(update_fields=['amount'])
+            row.delete()
+
+
+def merge_duplicates(apps, schema_editor):
+    # Re-running the old bulk_create imports left copies of the catalog.
+    Ingredient = apps.get_model('foodgram', 'Ingredient')
+    IngredientAmountForRecipe = apps.get_model(
+        'foodgram', 'IngredientAmountForRecipe'
+    )
+    ShoppingListItem = apps.get_model('foodgram', 'ShoppingListItem')
+    for group in Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        kept_id=Min('id'), copies=Count('id')
+    ).filter(copies__gt=1).order_by():
+        duplicates = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(id=group['kept_id']).values_list('id', flat=True))
+        for duplicate_id in duplicates:
+            merge_rows(
+                IngredientAmountForRecipe, 'recipe_id',
+                duplicate_id, group['kept_id']
+            )
+            merge_rows(
+                ShoppingListItem, 'user_id', duplicate_id, group['kept_id']
+            )
+        Ingredient.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0010_ingredient_canonical_unit'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
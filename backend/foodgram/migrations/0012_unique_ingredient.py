@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate from 0011 so the merge commits before the table is
+    # altered; Postgres refuses ALTER TABLE with pending FK triggers.
+
+    dependencies = [
+        ('foodgram', '0011_merge_duplicate_ingredients'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
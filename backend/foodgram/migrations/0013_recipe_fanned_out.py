@@ -0,0 +1,37 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+def mark_pulled_recipes(apps, schema_editor):
+    # Before this flag, recipes of authors above the fan-out limit were
+    # pulled only while the author stayed above it. Every recipe that has
+    # no feed entry although its author has followers is pulled now.
+    Recipe = apps.get_model('foodgram', 'Recipe')
+    Recipe.objects.filter(
+        author__followers_count__gt=0
+    ).exclude(
+        id__in=apps.get_model('foodgram', 'FeedEntry').objects.values(
+            'recipe_id'
+        )
+    ).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram', '0012_unique_ingredient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='fanned_out',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Разложен по лентам подписчиков'),
+        ),
+        migrations.RunPython(mark_pulled_recipes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('fanned_out', False)), fields=['author', '-created_at', '-id'], name='recipe_pulled_feed_idx'),
+        ),
+    ]
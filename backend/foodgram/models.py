@@ -1,8 +1,13 @@
+from collections import defaultdict
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import RowNumber
 
+from .units import normalize
 from .validators import username_validator
 
 
@@ -29,6 +34,20 @@ class CustomUserManager(BaseUserManager):
         return self.create_user(email, username, password, **extra_fields)
 
 
+class UserQuerySet(models.QuerySet):
+    def with_is_subscribed(self, user):
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_subscribed=models.Exists(
+                Follow.objects.filter(
+                    subscriber=user,
+                    subscribed_to=models.OuterRef('pk')
+                )
+            )
+        )
+
+
 class User(AbstractUser):
     email = models.EmailField(
         unique=True,
@@ -48,7 +67,22 @@ class User(AbstractUser):
         max_length=20,
         verbose_name='Фамилия'
     )
-    objects = CustomUserManager()
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Рецептов в списке покупок'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
+    objects = CustomUserManager.from_queryset(UserQuerySet)()
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (
         'username',
@@ -96,14 +130,111 @@ class Ingredient(models.Model):
         max_length=25,
         verbose_name='Единица Измерения'
     )
+    canonical_unit = models.CharField(
+        max_length=25,
+        editable=False,
+        verbose_name='Единица для подсчёта'
+    )
+    unit_factor = models.FloatField(
+        default=1,
+        editable=False,
+        verbose_name='Множитель для подсчёта'
+    )
 
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
+    def normalize_unit(self):
+        self.canonical_unit, self.unit_factor = normalize(
+            self.name, self.measurement_unit
+        )
+
+    def save(self, *args, **kwargs):
+        self.normalize_unit()
+        super().save(*args, **kwargs)
+
+
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_favorited=models.Exists(
+                FavoriteRecipe.objects.filter(
+                    user=user,
+                    recipe=models.OuterRef('pk')
+                )
+            ),
+            is_in_shopping_cart=models.Exists(
+                RecipeShoppingCart.objects.filter(
+                    user=user,
+                    recipe=models.OuterRef('pk')
+                )
+            ),
+        )
+
+    def with_related(self, user):
+        return self.prefetch_related(
+            models.Prefetch(
+                'author',
+                queryset=User.objects.with_is_subscribed(user)
+            ),
+            'tags',
+            models.Prefetch(
+                'recipe_amount',
+                queryset=IngredientAmountForRecipe.objects.select_related(
+                    'ingredient'
+                )
+            ),
+        )
+
+    def for_detail(self, user):
+        return self.with_user_flags(user).with_related(user)
+
+    def for_preview(self):
+        return self.only(
+            'id', 'author', 'name', 'image', 'image_variants', 'cooking_time'
+        )
+
+    def previews(self, author_ids, limit=None):
+        """Map author id to their newest recipes, at most limit each.
+
+        The per-author limit is applied with ROW_NUMBER() OVER
+        (PARTITION BY author) in a single query for all authors.
+        """
+        recipes = self.for_preview().filter(author__in=author_ids)
+        if limit is not None:
+            ranked = recipes.annotate(
+                row_number=models.Window(
+                    expression=RowNumber(),
+                    partition_by=models.F('author'),
+                    order_by=(
+                        models.F('created_at').desc(),
+                        models.F('id').desc(),
+                    )
+                )
+            ).order_by()
+            sql, params = ranked.query.get_compiler(self.db).as_sql()
+            recipes = self.raw(
+                f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s '
+                f'ORDER BY author_id, row_number',
+                (*params, limit)
+            )
+        previews = defaultdict(list)
+        for recipe in recipes:
+            previews[recipe.author_id].append(recipe)
+        return previews
+
 
 class Recipe(models.Model):
     author = models.ForeignKey(
@@ -119,6 +250,12 @@ class Recipe(models.Model):
         upload_to='foodgram/images/',
         verbose_name='Картинка'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии картинки'
+    )
     text = models.TextField(
         max_length=256,
         verbose_name='текст'
@@ -143,11 +280,42 @@ class Recipe(models.Model):
     created_at = models.DateTimeField(
         auto_now_add=True
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном'
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False
+    )
+    fanned_out = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Разложен по лентам подписчиков'
+    )
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
-        ordering = ('-created_at',)
+        ordering = ('-created_at', '-id')
+        indexes = [
+            models.Index(
+                fields=('-created_at', '-id'),
+                name='recipe_created_at_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-created_at', '-id'),
+                name='recipe_pulled_feed_idx',
+                condition=models.Q(fanned_out=False)
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -217,6 +385,15 @@ class FavoriteRecipe(RecipeSection):
 
 
 class RecipeShoppingCart(RecipeSection):
+    servings = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[
+            MinValueValidator(settings.MIN_SERVINGS),
+            MaxValueValidator(settings.MAX_SERVINGS)
+        ],
+        verbose_name='Порций'
+    )
+
     class Meta(RecipeSection.Meta):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
@@ -249,3 +426,103 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.subscriber} {self.subscribed_to}'
+
+
+class RecipeSimilarity(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(
+        verbose_name='Сходство'
+    )
+    computed_at = models.DateTimeField(
+        verbose_name='Рассчитано'
+    )
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'similar'),
+                name='unique_recipe_similarity'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} {self.similar_id}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата публикации рецепта'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        default_related_name = 'feed_entries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-created_at', '-recipe'),
+                name='feed_user_created_at_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.recipe_id}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент'
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество'
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списков покупок'
+        default_related_name = 'shopping_list'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.ingredient_id} {self.amount}'
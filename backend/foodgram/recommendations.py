@@ -0,0 +1,121 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from .models import FavoriteRecipe, RecipeShoppingCart, RecipeSimilarity
+
+INTERACTIONS = (FavoriteRecipe, RecipeShoppingCart)
+DELETE_BATCH_SIZE = 500
+
+
+def load_interactions():
+    """Return the user -> recipes and recipe -> users incidence sets."""
+    recipes_by_user = defaultdict(set)
+    users_by_recipe = defaultdict(set)
+    for model in INTERACTIONS:
+        for user_id, recipe_id in model.objects.values_list(
+            'user_id', 'recipe_id'
+        ).iterator():
+            recipes_by_user[user_id].add(recipe_id)
+            users_by_recipe[recipe_id].add(user_id)
+    return recipes_by_user, users_by_recipe
+
+
+def neighbours(recipe_id, recipes_by_user, users_by_recipe, top_k):
+    # Cosine similarity over binary user vectors: co-occurrences with
+    # every other recipe come from one Counter pass over the recipe's
+    # users, so only non-zero cells of the matrix are ever touched.
+    cooccurrences = Counter()
+    for user_id in users_by_recipe[recipe_id]:
+        cooccurrences.update(recipes_by_user[user_id])
+    del cooccurrences[recipe_id]
+    size = len(users_by_recipe[recipe_id])
+    return heapq.nlargest(top_k, (
+        (count / math.sqrt(size * len(users_by_recipe[other])), other)
+        for other, count in cooccurrences.items()
+    ))
+
+
+def changed_recipes(since):
+    recipe_ids = set()
+    for model in INTERACTIONS:
+        recipe_ids.update(model.objects.filter(
+            added_at__gt=since
+        ).values_list('recipe_id', flat=True))
+    return recipe_ids
+
+
+def build_recommendations(full=False, top_k=None):
+    """Recompute stored neighbours and return (recipes, rows) written.
+
+    Without full only recipes that gained favorites or cart entries
+    since the previous run are recomputed, together with every recipe
+    they co-occur with, since those scores moved too. Removed favorites
+    leave no trace to detect, so a full run is still needed now and then.
+    """
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+    started_at = timezone.now()
+    last_run = None if full else RecipeSimilarity.objects.aggregate(
+        last_run=Max('computed_at')
+    )['last_run']
+    recipes_by_user, users_by_recipe = load_interactions()
+    if last_run is None:
+        targets = set(users_by_recipe)
+    else:
+        changed = changed_recipes(last_run)
+        targets = changed | {
+            other
+            for recipe_id in changed
+            for user_id in users_by_recipe[recipe_id]
+            for other in recipes_by_user[user_id]
+        }
+    rows = [
+        RecipeSimilarity(
+            recipe_id=recipe_id, similar_id=similar_id,
+            score=score, computed_at=started_at
+        )
+        for recipe_id in targets
+        for score, similar_id in neighbours(
+            recipe_id, recipes_by_user, users_by_recipe, top_k
+        )
+    ]
+    with transaction.atomic():
+        if last_run is None:
+            RecipeSimilarity.objects.all().delete()
+        else:
+            stale = sorted(targets)
+            for start in range(0, len(stale), DELETE_BATCH_SIZE):
+                RecipeSimilarity.objects.filter(
+                    recipe_id__in=stale[start:start + DELETE_BATCH_SIZE]
+                ).delete()
+        RecipeSimilarity.objects.bulk_create(rows, batch_size=1000)
+    return len(targets), len(rows)
+
+
+def recommended_ids(user):
+    """Rank recipes by summed similarity to the user's favorites and cart.
+
+    One aggregate over the stored neighbour lists of those recipes;
+    recipes the user already saved or wrote are left out.
+    """
+    favorites, cart = (
+        model.objects.filter(user=user).values('recipe_id')
+        for model in INTERACTIONS
+    )
+    return list(RecipeSimilarity.objects.filter(
+        Q(recipe__in=favorites) | Q(recipe__in=cart)
+    ).exclude(
+        Q(similar__in=favorites) | Q(similar__in=cart)
+        | Q(similar__author=user)
+    ).values('similar_id').annotate(
+        total_score=Sum('score')
+    ).order_by(
+        '-total_score', '-similar_id'
+    ).values_list(
+        'similar_id', flat=True
+    )[:settings.RECOMMENDATIONS_LIMIT])
@@ -0,0 +1,95 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe
+
+FTS_TABLE = 'foodgram_recipe_fts'
+NAME_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+SEARCH_FIELDS = {'name', 'text'}
+
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def search_vector():
+    return (
+        SearchVector('name', weight='A', config=settings.SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=settings.SEARCH_CONFIG)
+    )
+
+
+def index_recipe(recipe):
+    if is_postgres():
+        Recipe.objects.filter(pk=recipe.pk).update(
+            search_vector=search_vector()
+        )
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (recipe.pk,)
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+            'VALUES (%s, %s, %s)',
+            (recipe.pk, recipe.name, recipe.text)
+        )
+
+
+def unindex_recipe(recipe):
+    if is_postgres():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (recipe.pk,)
+        )
+
+
+def rebuild_search_index():
+    if is_postgres():
+        Recipe.objects.update(search_vector=search_vector())
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+            f'SELECT id, name, text FROM {Recipe._meta.db_table}'
+        )
+
+
+def fts_query(value):
+    # Every word becomes a quoted prefix term, so user input can never
+    # be parsed as FTS5 syntax.
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', value))
+
+
+def search_recipes(queryset, value):
+    if is_postgres():
+        query = SearchQuery(
+            value, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+    else:
+        match = fts_query(value)
+        if not match:
+            return queryset.none()
+        recipe_table = Recipe._meta.db_table
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        )).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {NAME_WEIGHT}, {TEXT_WEIGHT}) '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid = {recipe_table}.id',
+            (match,)
+        ))
+    return queryset.order_by('-search_rank', '-created_at', '-id')
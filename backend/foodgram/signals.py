@@ -0,0 +1,72 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cart import apply_cart_changes
+from .counters import COUNTERS, change_counters
+from .feed import backfill, fan_out, trim
+from .models import Follow, Recipe, RecipeShoppingCart
+from .search import SEARCH_FIELDS, index_recipe, unindex_recipe
+
+
+def increment_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_counters(sender, (instance,), 1)
+
+
+def decrement_counters(sender, instance, **kwargs):
+    change_counters(sender, (instance,), -1)
+
+
+for counted_model in {counted for _, _, counted, _ in COUNTERS}:
+    post_save.connect(increment_counters, sender=counted_model)
+    post_delete.connect(decrement_counters, sender=counted_model)
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        index_recipe(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_recipe(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_to_feeds(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        backfill((instance,))
+
+
+@receiver(post_delete, sender=Follow)
+def trim_feed(sender, instance, **kwargs):
+    trim(instance)
+
+
+@receiver(post_save, sender=RecipeShoppingCart)
+def add_to_shopping_list(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply_cart_changes(
+            instance.user_id, {instance.recipe_id: instance.servings}
+        )
+
+
+@receiver(pre_delete, sender=RecipeShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    # pre_delete: when a recipe is deleted its ingredient amounts may be
+    # gone by the time post_delete reaches the cart rows. The row lock
+    # makes a concurrent delete of the same row wait and then skip it.
+    if not RecipeShoppingCart.objects.select_for_update().filter(
+        pk=instance.pk
+    ).exists():
+        return
+    apply_cart_changes(
+        instance.user_id, {instance.recipe_id: -instance.servings}
+    )
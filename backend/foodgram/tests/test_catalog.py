@@ -0,0 +1,113 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from foodgram import catalog
+from foodgram.catalog import (CATALOGS, CatalogError, import_catalog,
+                              insert_rows, read_json_array)
+from foodgram.models import Ingredient, Tag
+
+
+class ReadJsonArrayTest(SimpleTestCase):
+    def read(self, text):
+        # Chunks cut through keys, strings and numbers.
+        with mock.patch.object(catalog, 'READ_SIZE', 5):
+            return list(read_json_array(io.StringIO(text)))
+
+    def test_items_across_chunks(self):
+        items = [{'name': 'мука', 'amount': -1.25e3}, True, None, 'x, y']
+        self.assertEqual(
+            self.read(' [\n' + ',\n'.join(map(json.dumps, items)) + ']'),
+            items
+        )
+        self.assertEqual(self.read('[ ]'), [])
+
+    def test_syntax_error_is_reported_where_it_is(self):
+        file = io.StringIO(
+            '[\n{"name": "a"},\n{"name": "b" "c"}' + ', {}' * 10000 + ']'
+        )
+        with mock.patch.object(catalog, 'READ_SIZE', 5):
+            with self.assertRaisesMessage(
+                CatalogError, "line 3: Expecting ',' delimiter (char 30)"
+            ):
+                list(read_json_array(file))
+        self.assertLess(file.tell(), 100)
+
+    def test_truncated_input(self):
+        for text in ('[{"name": "a"}', '[{"name": "a', '[{"name": tru'):
+            with self.subTest(text=text):
+                with self.assertRaisesMessage(CatalogError, 'line 1: '):
+                    self.read(text)
+        with self.assertRaisesMessage(CatalogError, 'must be an array'):
+            self.read('{"name": "a"}')
+
+
+class ImportCatalogTest(TestCase):
+    rows = [
+        {'name': 'мука', 'measurement_unit': 'г'},
+        {'name': ' соль ', 'measurement_unit': 'ст. л.'},
+        {'name': 'мука', 'measurement_unit': 'г'},
+        {'name': '', 'measurement_unit': 'г'},
+        ['мука'],
+    ]
+
+    def test_rerun_is_idempotent(self):
+        ingredients = CATALOGS['ingredients']
+        first = import_catalog(ingredients, self.rows, batch_size=2)
+        self.assertEqual(
+            (first['created'], first['duplicate'], first['invalid']),
+            (2, 1, 2)
+        )
+        salt = Ingredient.objects.get(name='соль')
+        self.assertEqual(
+            (salt.canonical_unit, salt.unit_factor), ('г', 15 * 1.2)
+        )
+        second = import_catalog(ingredients, self.rows)
+        self.assertEqual(
+            (second['created'], second['unchanged']), (0, 2)
+        )
+
+    def test_update_and_dry_run(self):
+        tags = CATALOGS['tags']
+        row = {'slug': 'breakfast', 'name': 'Завтрак', 'color': '#E26C2D'}
+        import_catalog(tags, [row])
+        diff = import_catalog(tags, [{**row, 'name': 'Утро'}], dry_run=True)
+        self.assertEqual(diff['updated'], 1)
+        self.assertEqual(Tag.objects.get().name, 'Завтрак')
+        import_catalog(tags, [{**row, 'name': 'Утро'}])
+        self.assertEqual(Tag.objects.get().name, 'Утро')
+
+    def test_insert_reports_rows_actually_inserted(self):
+        Ingredient.objects.create(name='мука', measurement_unit='г')
+        self.assertEqual(insert_rows(Ingredient, [
+            {'name': name, 'measurement_unit': 'г',
+             'canonical_unit': 'г', 'unit_factor': 1}
+            for name in ('мука', 'соль')
+        ]), 1)
+        self.assertEqual(Ingredient.objects.count(), 2)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'ingredients.txt'
+            path.write_text(json.dumps(self.rows), encoding='utf-8')
+            stdout = io.StringIO()
+            call_command(
+                'import_catalog', 'ingredients', str(path),
+                stdout=stdout, stderr=io.StringIO()
+            )
+            self.assertIn(
+                'Imported 5 rows: 2 created, 0 updated, 0 unchanged, '
+                '1 duplicates, 2 invalid',
+                stdout.getvalue()
+            )
+            path.write_text('[{"name" "мука"}]', encoding='utf-8')
+            with self.assertRaisesMessage(CommandError, 'line 1: '):
+                call_command(
+                    'import_catalog', 'ingredients', str(path),
+                    stdout=io.StringIO(), stderr=io.StringIO()
+                )
@@ -0,0 +1,80 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.counters import counter_mismatches, delete_counted
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import FavoriteRecipe, Follow, Recipe
+from .utils import create_recipe, create_user
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class CounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.author = create_user()
+        cls.recipes = [create_recipe(cls.author) for _ in range(3)]
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.assertEqual(list(counter_mismatches()), [])
+
+    def favorites_counts(self):
+        return list(Recipe.objects.filter(
+            id__in=[recipe.id for recipe in self.recipes]
+        ).order_by('id').values_list('favorites_count', flat=True))
+
+    def test_favorite_added_and_deleted_twice(self):
+        url = reverse('recipes-favorite', kwargs={'id': self.recipes[0].id})
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(self.favorites_counts(), [1, 0, 0])
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        self.assertEqual(self.favorites_counts(), [0, 0, 0])
+
+    def test_bulk_add_counts_new_rows_only(self):
+        self.client.post(
+            reverse('recipes-favorite', kwargs={'id': self.recipes[0].id})
+        )
+        url = reverse('recipes-favorite-bulk')
+        data = {'recipes': [recipe.id for recipe in self.recipes]}
+        for _ in range(2):
+            self.assertEqual(
+                self.client.post(url, data, format='json').status_code, 200
+            )
+        self.assertEqual(self.favorites_counts(), [1, 1, 1])
+        self.client.delete(url, {'recipes': data['recipes'][:2]},
+                           format='json')
+        self.assertEqual(self.favorites_counts(), [0, 0, 1])
+
+    def test_recipes_and_followers(self):
+        url = reverse('users-subscribe', kwargs={'id': self.author.id})
+        self.client.post(url)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+        self.assertEqual(self.author.recipes_count, 3)
+        self.client.delete(url)
+        self.recipes[0].delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
+        self.assertEqual(self.author.recipes_count, 2)
+
+    def test_delete_counted_returns_each_row_once(self):
+        FavoriteRecipe.objects.create(user=self.user, recipe=self.recipes[1])
+        queryset = FavoriteRecipe.objects.filter(user=self.user)
+        self.assertEqual(len(delete_counted(queryset)), 1)
+        self.assertEqual(delete_counted(queryset), [])
+        self.assertEqual(self.favorites_counts(), [0, 0, 0])
+
+    def test_delete_counted_refuses_cascading_models(self):
+        Follow.objects.create(subscriber=self.user, subscribed_to=self.author)
+        with self.assertRaises(TypeError):
+            delete_counted(Recipe.objects.filter(author=self.author))
@@ -0,0 +1,108 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.feed import feed_keys
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import FeedEntry, Follow, Recipe
+from .utils import create_recipe, create_user
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class FeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.author = create_user()
+        cls.old = create_recipe(cls.author)
+        Follow.objects.create(subscriber=cls.user, subscribed_to=cls.author)
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+
+    def feed(self):
+        return [recipe_id for _, recipe_id in feed_keys(self.user, None, 50)]
+
+    def test_new_recipe_is_fanned_out(self):
+        recipe = create_recipe(self.author)
+        self.assertTrue(recipe.fanned_out)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, recipe=recipe).exists()
+        )
+        self.assertEqual(self.feed(), [recipe.id, self.old.id])
+
+    def test_popular_author_recipe_stays_pulled(self):
+        with self.settings(FEED_FANOUT_LIMIT=0):
+            recipe = create_recipe(self.author)
+        recipe.refresh_from_db()
+        self.assertFalse(recipe.fanned_out)
+        self.assertFalse(FeedEntry.objects.filter(recipe=recipe).exists())
+        # Still in the feed once the author is below the limit again.
+        self.assertEqual(self.feed(), [recipe.id, self.old.id])
+
+    def test_decision_reads_the_current_follower_count(self):
+        # As from the token cache, loaded before the second follower.
+        stale_author = Recipe.objects.get(pk=self.old.pk).author
+        Follow.objects.create(subscriber=create_user(),
+                              subscribed_to=self.author)
+        with self.settings(FEED_FANOUT_LIMIT=1):
+            recipe = create_recipe(stale_author)
+        recipe.refresh_from_db()
+        self.assertFalse(recipe.fanned_out)
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        follower = create_user()
+        client = APIClient()
+        client.force_authenticate(follower)
+        url = reverse('users-subscribe', kwargs={'id': self.author.id})
+        client.post(url)
+        self.assertEqual(
+            list(FeedEntry.objects.filter(
+                user=follower
+            ).values_list('recipe_id', flat=True)),
+            [self.old.id]
+        )
+        client.delete(url)
+        self.assertFalse(FeedEntry.objects.filter(user=follower).exists())
+
+    def test_pages_merge_entries_and_pulled_recipes(self):
+        recipes = [self.old]
+        for number in range(4):
+            with self.settings(FEED_FANOUT_LIMIT=number % 2):
+                recipes.append(create_recipe(self.author))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('recipes-feed'), {'limit': 2})
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [recipe['id'] for recipe in response.json()['results']]
+            if response.json()['next'] is None:
+                break
+            response = client.get(response.json()['next'])
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+        self.assertEqual(
+            Recipe.objects.filter(fanned_out=False).count(), 2
+        )
+
+    def test_migration_marks_recipes_without_entries(self):
+        migration = import_module(
+            'foodgram.migrations.0013_recipe_fanned_out'
+        )
+        lost = create_recipe(self.author)
+        FeedEntry.objects.filter(recipe=lost).delete()
+        unfollowed = create_recipe(create_user())
+        migration.mark_pulled_recipes(apps, None)
+        self.assertEqual(
+            set(Recipe.objects.filter(
+                fanned_out=False
+            ).values_list('id', flat=True)),
+            {lost.id}
+        )
+        self.assertIn(lost.id, self.feed())
+        self.assertNotIn(unfollowed.id, self.feed())
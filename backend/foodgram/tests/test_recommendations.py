@@ -0,0 +1,69 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from foodgram.management.commands.benchmark_api import BENCHMARK_CACHES
+from foodgram.models import (FavoriteRecipe, RecipeShoppingCart,
+                             RecipeSimilarity)
+from foodgram.recommendations import build_recommendations, recommended_ids
+from .utils import create_recipe, create_user
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        author = create_user()
+        cls.a, cls.b, cls.c, cls.d = (
+            create_recipe(author) for _ in range(4)
+        )
+        cls.own = create_recipe(cls.user)
+        first, second, third = (create_user() for _ in range(3))
+        for user, recipes in ((first, (cls.a, cls.b, cls.own)),
+                              (second, (cls.a, cls.b, cls.c)),
+                              (third, (cls.c, cls.d))):
+            for recipe in recipes:
+                FavoriteRecipe.objects.create(user=user, recipe=recipe)
+        cls.third = third
+
+    def setUp(self):
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+
+    def similarities(self):
+        return {
+            (row.recipe_id, row.similar_id): round(row.score, 6)
+            for row in RecipeSimilarity.objects.all()
+        }
+
+    def test_recommendations_rank_by_similarity(self):
+        build_recommendations(full=True)
+        FavoriteRecipe.objects.create(user=self.user, recipe=self.a)
+        # b shares both users with a, c one of two, own is excluded.
+        self.assertEqual(
+            recommended_ids(self.user), [self.b.id, self.c.id]
+        )
+        RecipeShoppingCart.objects.create(user=self.user, recipe=self.b)
+        self.assertEqual(recommended_ids(self.user), [self.c.id])
+
+    def test_incremental_run_matches_full_run(self):
+        build_recommendations(full=True)
+        FavoriteRecipe.objects.create(user=self.third, recipe=self.a)
+        build_recommendations()
+        incremental = self.similarities()
+        build_recommendations(full=True)
+        self.assertEqual(incremental, self.similarities())
+
+    def test_endpoint(self):
+        build_recommendations(full=True)
+        FavoriteRecipe.objects.create(user=self.user, recipe=self.a)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('recipes-recommended'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            [self.b.id, self.c.id]
+        )
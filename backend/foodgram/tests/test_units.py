@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from foodgram.units import humanize, normalize
+
+
+class UnitsTest(SimpleTestCase):
+    def test_normalize(self):
+        for name, unit, expected in (
+            ('сахар', 'кг', ('г', 1000)),
+            ('сахар', ' Ст.  л. ', ('г', 15 * 0.85)),
+            ('Молоко', 'стакан', ('г', 250 * 1.03)),
+            ('молоко сухое', 'стакан', ('мл', 250)),
+            ('сок', 'л', ('мл', 1000)),
+            ('яйца', 'шт.', ('шт.', 1)),
+        ):
+            with self.subTest(name=name, unit=unit):
+                self.assertEqual(normalize(name, unit), expected)
+
+    def test_humanize(self):
+        for quantity, unit, expected in (
+            (1500, 'г', ('1.5', 'кг')),
+            (999.6, 'г', ('1', 'кг')),
+            (7.95, 'мл', ('8', 'мл')),
+            (2.25, 'мл', ('2.2', 'мл')),
+            (12.4, 'шт.', ('12', 'шт.')),
+            (2000, 'шт.', ('2000', 'шт.')),
+        ):
+            with self.subTest(quantity=quantity, unit=unit):
+                self.assertEqual(humanize(quantity, unit), expected)
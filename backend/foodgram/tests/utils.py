@@ -0,0 +1,45 @@
+from itertools import count
+
+from foodgram.models import (Ingredient, IngredientAmountForRecipe, Recipe,
+                             Tag, User)
+
+numbers = count()
+
+
+def create_user(**fields):
+    number = next(numbers)
+    return User.objects.create_user(
+        f'user{number}@test.local', f'user{number}', 'password',
+        **{'first_name': 'User', 'last_name': str(number), **fields}
+    )
+
+
+def create_ingredient(name=None, measurement_unit='г'):
+    return Ingredient.objects.create(
+        name=name or f'ingredient {next(numbers)}',
+        measurement_unit=measurement_unit
+    )
+
+
+def create_tag():
+    number = next(numbers)
+    return Tag.objects.create(
+        name=f'tag {number}', color='#000000', slug=f'tag-{number}'
+    )
+
+
+def create_recipe(author, ingredients=(), amount=10, tags=(), **fields):
+    """Recipe with amount of each ingredient, saved like the API does."""
+    recipe = Recipe.objects.create(author=author, **{
+        'name': f'recipe {next(numbers)}',
+        'image': 'foodgram/images/test.png',
+        'text': 'text',
+        'cooking_time': 10,
+        **fields,
+    })
+    for ingredient in ingredients:
+        IngredientAmountForRecipe.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+    recipe.tags.set(tags)
+    return recipe
@@ -0,0 +1,75 @@
+GRAM = 'г'
+KILOGRAM = 'кг'
+MILLILITRE = 'мл'
+LITRE = 'л'
+
+# Unit as written in ingredients.csv -> (canonical unit, factor).
+UNITS = {
+    'г': (GRAM, 1),
+    'гр': (GRAM, 1),
+    'кг': (GRAM, 1000),
+    'мл': (MILLILITRE, 1),
+    'л': (MILLILITRE, 1000),
+    'ч. л.': (MILLILITRE, 5),
+    'десертная ложка': (MILLILITRE, 10),
+    'ст. л.': (MILLILITRE, 15),
+    'стакан': (MILLILITRE, 250),
+}
+
+# Grams per millilitre. Volumes of these ingredients are converted to
+# grams, so "мука, ст. л." and "мука, г" end up on one line. Names are
+# matched exactly: "молоко сухое" is not "молоко".
+DENSITIES = {
+    'вода': 1.0,
+    'молоко': 1.03,
+    'кефир': 1.03,
+    'сливки': 1.0,
+    'сметана': 1.0,
+    'мед': 1.4,
+    'мёд': 1.4,
+    'мука': 0.53,
+    'сахар': 0.85,
+    'сахарная пудра': 0.6,
+    'соль': 1.2,
+    'крахмал': 0.65,
+    'манная крупа': 0.65,
+    'рис': 0.8,
+    'растительное масло': 0.92,
+    'подсолнечное масло': 0.92,
+    'оливковое масло': 0.92,
+    'уксус': 1.0,
+}
+
+# Canonical unit -> (larger unit, factor) used when rendering totals.
+LARGER_UNITS = {
+    GRAM: (KILOGRAM, 1000),
+    MILLILITRE: (LITRE, 1000),
+}
+
+
+def normalize(name, measurement_unit):
+    """Return (canonical_unit, factor) for an ingredient.
+
+    Amounts multiplied by factor are in canonical_unit. Units outside the
+    registry (шт., по вкусу, ...) are canonical themselves.
+    """
+    unit = ' '.join(measurement_unit.split()).lower()
+    canonical_unit, factor = UNITS.get(unit, (measurement_unit, 1))
+    density = DENSITIES.get(' '.join(name.split()).lower())
+    if canonical_unit == MILLILITRE and density is not None:
+        return GRAM, factor * density
+    return canonical_unit, factor
+
+
+def format_number(value, digits):
+    return f'{value:.{digits}f}'.rstrip('0').rstrip('.')
+
+
+def humanize(quantity, canonical_unit):
+    """Render a total as (quantity, unit): 1500 г -> ('1.5', 'кг')."""
+    quantity = round(quantity) if quantity >= 10 else round(quantity, 1)
+    if canonical_unit in LARGER_UNITS:
+        larger_unit, factor = LARGER_UNITS[canonical_unit]
+        if quantity >= factor:
+            return format_number(quantity / factor, 2), larger_unit
+    return format_number(quantity, 1), canonical_unit